@@ -53,7 +53,6 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'newsapp.middleware.NewsRefreshMiddleware',
 ]
 
 ROOT_URLCONF = 'infosphere.urls'
@@ -88,6 +87,22 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Must be shared by all processes: the scheduler and workers ingest articles and move the
+# content version the web server's pages and ETags depend on. The file-based cache is
+# shared by every process on this host; across hosts use Redis or Memcached instead.
+# Never a per-process LocMemCache outside tests.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -174,3 +189,62 @@ LOGGING = {
 NEWS_API_KEY = os.environ.get('NEWS_API_KEY', '')
 GNEWS_API_KEY = os.environ.get('GNEWS_API_KEY', '')
 NEWS_REFRESH_INTERVAL = 3600  # 1 hour in seconds
+# Per-provider refresh intervals in seconds for run_scheduler; other providers use NEWS_REFRESH_INTERVAL
+NEWS_REFRESH_SCHEDULES = {}
+NEWS_SCHEDULER_LEASE_TTL = 300  # seconds a scheduler stays leader without renewing
+NEWS_SCHEDULER_TICK = 15  # seconds between schedule checks
+
+# News fetch settings
+NEWS_PROVIDERS = ['newsapi', 'gnews']  # providers fetch_news uses by default
+# Endpoints can be pointed at a local stub server for testing
+NEWS_API_ENDPOINT = os.environ.get('NEWS_API_ENDPOINT', 'https://newsapi.org/v2/top-headlines')
+GNEWS_API_ENDPOINT = os.environ.get('GNEWS_API_ENDPOINT', 'https://gnews.io/api/v4/top-headlines')
+NEWS_FETCH_CONCURRENCY = {  # max in-flight requests per provider
+    'newsapi': 5,
+    'gnews': 1,
+}
+NEWS_FETCH_TIMEOUT = 10  # per request, in seconds
+NEWS_FETCH_DEADLINE = 20  # for all requests of one refresh, in seconds
+
+# On-disk cache of upstream API responses, revalidated with ETag/If-Modified-Since
+NEWS_HTTP_CACHE_DIR = BASE_DIR / 'http_cache'
+NEWS_HTTP_CACHE_TTL = 300  # serve without revalidating for this many seconds
+NEWS_HTTP_CACHE_MAX_BYTES = 50 * 1024 * 1024  # least recently used entries are evicted beyond this
+
+# Upstream quotas as token buckets shared by all processes: on average `requests`
+# per `period` seconds, at most `burst` at once. Providers not listed are unlimited.
+NEWS_RATE_LIMITS = {
+    'newsapi': {'requests': 100, 'period': 86400, 'burst': 10},
+    'gnews': {'requests': 100, 'period': 86400, 'burst': 5},
+}
+NEWS_FETCH_RETRIES = 2  # retries after connection errors, 429 and 5xx responses
+NEWS_FETCH_BACKOFF = 1.0  # base of the jittered exponential backoff, in seconds
+
+# Background jobs run by manage.py run_worker
+NEWS_JOB_POLL_INTERVAL = 2  # seconds between queue checks when idle
+NEWS_JOB_TIMEOUT = 900  # running jobs whose worker stops sending heartbeats for this long are marked failed
+
+# Search ranks only the newest this many matches, bounding the cost of very common terms
+NEWS_SEARCH_MAX_RESULTS = 1000
+NEWS_FEED_COUNT_TTL = 300  # seconds the home feed's total article count is cached per filter
+NEWS_CATEGORY_LINK_MAX = 2000  # category filters up to this many articles use NewsCategory, larger ones the mask
+
+# Full-page cache for anonymous visitors (home, categories, sources). Pages are
+# replaced when ingest or an admin edit bumps the content version; the timeout
+# only bounds how long unused pages occupy the cache.
+NEWS_PAGE_CACHE = 'default'  # alias in CACHES
+NEWS_PAGE_CACHE_TIMEOUT = 3600
+NEWS_PAGE_CACHE_LOCK_TIMEOUT = 10  # seconds concurrent requests wait for a page being rendered
+NEWS_CARD_CACHE_TIMEOUT = 86400  # rendered news cards; keys change whenever an article does
+NEWS_TAXONOMY_CACHE_TIMEOUT = 86400  # categories and sources; reloaded on change regardless
+
+# Per-user reads are buffered in each process and written to UserNews in batches
+NEWS_READ_FLUSH_INTERVAL = 5  # seconds between writes
+NEWS_READ_FLUSH_SIZE = 500  # write sooner once this many reads are pending
+NEWS_USER_STATE_TIMEOUT = 3600  # cached bookmarked/read ids per user; reloaded on change regardless
+
+# "My feed" is precomputed (FeedEntry rows written at ingest) for preferences narrower than this
+NEWS_FEED_FANOUT_MAX_SHARE = 0.25  # share of all articles; broader feeds are queried from News
+NEWS_FEED_MAX_ENTRIES = 1000  # newest entries kept per precomputed feed
+
+NEWS_API_PAGE_SIZE = 20  # articles per page of /api/news/
@@ -1,17 +1,18 @@
 from django.contrib import admin
 from .models import (
     Category, Source, News, NewsCategory, UserNews,
-    Comment, Bookmark, UserPreference
+    Comment, Bookmark, UserPreference, FetchCursor, SyndicatedArticle,
+    ProviderRateLimit, BackfillCheckpoint, FeedEntry
 )
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ('name',)
+    list_display = ('name', 'news_count')
     search_fields = ('name',)
 
 @admin.register(Source)
 class SourceAdmin(admin.ModelAdmin):
-    list_display = ('name', 'website_url', 'country')
+    list_display = ('name', 'website_url', 'country', 'news_count')
     search_fields = ('name', 'country')
     list_filter = ('country',)
 
@@ -29,7 +30,7 @@ class NewsCategoryAdmin(admin.ModelAdmin):
 
 @admin.register(UserNews)
 class UserNewsAdmin(admin.ModelAdmin):
-    list_display = ('user', 'news')
+    list_display = ('user', 'news', 'read_at')
     list_filter = ('user',)
 
 @admin.register(Comment)
@@ -47,5 +48,30 @@ class BookmarkAdmin(admin.ModelAdmin):
 
 @admin.register(UserPreference)
 class UserPreferenceAdmin(admin.ModelAdmin):
-    list_display = ('user', 'dark_mode')
-    list_filter = ('dark_mode', 'preferred_categories', 'preferred_sources')
+    list_display = ('user', 'dark_mode', 'feed_precomputed')
+    list_filter = ('dark_mode', 'feed_precomputed', 'preferred_categories', 'preferred_sources')
+
+@admin.register(FetchCursor)
+class FetchCursorAdmin(admin.ModelAdmin):
+    list_display = ('provider', 'source_key', 'last_published_at', 'updated_at')
+    list_filter = ('provider',)
+
+@admin.register(SyndicatedArticle)
+class SyndicatedArticleAdmin(admin.ModelAdmin):
+    list_display = ('title', 'source', 'news', 'similarity', 'published_at')
+    list_filter = ('source',)
+    search_fields = ('title', 'url')
+
+@admin.register(ProviderRateLimit)
+class ProviderRateLimitAdmin(admin.ModelAdmin):
+    list_display = ('provider', 'tokens', 'refilled_at', 'blocked_until')
+
+@admin.register(BackfillCheckpoint)
+class BackfillCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('name', 'last_pk', 'completed', 'updated_at')
+
+@admin.register(FeedEntry)
+class FeedEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'news', 'published_at')
+    list_filter = ('user',)
+    raw_id_fields = ('news',)
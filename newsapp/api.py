@@ -0,0 +1,155 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+
+from .categorizer import categories_by_news, filter_by_categories
+from .models import Category, News, Source, SyndicatedArticle
+from .pagecache import cache_is_shared, content_version, get_cache, page_cache_key
+from .pagination import CursorPaginator
+from .search import search_news
+from .taxonomy import get_taxonomy
+
+# Columns of an article in lists; content is only in the article itself
+NEWS_FIELDS = ('id', 'title', 'author', 'image_url', 'url', 'published_at', 'source_id', 'category_mask')
+NEWS_DETAIL_FIELDS = NEWS_FIELDS + ('content', 'updated_at')
+
+
+def etagged_json(request, build):
+    """A JSON response of ``build()`` with a strong ETag; a request already holding it gets a 304.
+
+    The encoded body and its ETag are cached per path and parameters
+    under the content version, like anonymous pages, so repeated
+    requests cost no queries whether they get the body or a 304. The
+    ETag is a hash of the body, so it stays valid across processes.
+    Bodies are built on every request when the cache isn't shared,
+    because ingests in other processes couldn't move its version.
+    ``build`` returns None for a missing object, answered with a 404.
+    """
+    shared = cache_is_shared()
+    cache = get_cache()
+    key = page_cache_key(request, content_version())
+    cached = cache.get(key) if shared else None
+    if cached is None:
+        data = build()
+        if data is None:
+            return JsonResponse({'error': 'Not found'}, status=404)
+        body = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+        cached = (body, f'"{hashlib.sha1(body).hexdigest()}"')
+        if shared:
+            cache.set(key, cached, getattr(settings, 'NEWS_PAGE_CACHE_TIMEOUT', 3600))
+
+    body, etag = cached
+    response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    # Clients may keep responses but check them with If-None-Match before reuse
+    patch_cache_control(response, no_cache=True)
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def news_json(rows, taxonomy):
+    """Articles as JSON objects from rows of NEWS_FIELDS, with source and categories from the taxonomy"""
+    categories = categories_by_news({row['id']: row['category_mask'] for row in rows}, taxonomy.categories)
+    results = []
+    for row in rows:
+        source = taxonomy.source_by_id.get(row['source_id'])
+        item = {field: row[field] for field in row if field not in ('source_id', 'category_mask')}
+        item['source'] = {'id': row['source_id'], 'name': source.name if source else None}
+        item['categories'] = [{'id': category.pk, 'name': category.name} for category in categories[row['id']]]
+        results.append(item)
+    return results
+
+
+def page_url(request, **params):
+    """This request's URL with some parameters replaced"""
+    query = request.GET.copy()
+    for name, value in params.items():
+        query[name] = value
+    return f'{request.path}?{query.urlencode()}'
+
+
+@require_safe
+def news_list(request):
+    """The feed as JSON: the home page's filters and cursor pages, or numbered pages of search results."""
+    def build():
+        taxonomy = get_taxonomy()
+        news = News.objects.all()
+        selected_categories = request.GET.getlist('categories')
+        if selected_categories:
+            news = filter_by_categories(news, taxonomy.get_categories(selected_categories))
+        selected_sources = request.GET.getlist('sources')
+        if selected_sources:
+            news = news.filter(source__id__in=selected_sources)
+        per_page = getattr(settings, 'NEWS_API_PAGE_SIZE', 20)
+
+        query = request.GET.get('q')
+        if query:
+            # Ranked results come back as instances with highlights; only the listed columns are loaded
+            paginator = Paginator(search_news(news.only(*NEWS_FIELDS), query), per_page)
+            page = paginator.get_page(request.GET.get('page'))
+            rows = [{field: getattr(article, field) for field in NEWS_FIELDS} for article in page.object_list]
+            results = news_json(rows, taxonomy)
+            for item, article in zip(results, page.object_list):
+                if hasattr(article, 'highlighted_title'):
+                    item['highlighted_title'] = str(article.highlighted_title)
+                    item['snippet'] = str(article.snippet)
+            return {
+                'results': results,
+                'count': paginator.count,
+                'next': page_url(request, page=page.next_page_number()) if page.has_next() else None,
+                'previous': page_url(request, page=page.previous_page_number()) if page.has_previous() else None,
+            }
+
+        page = CursorPaginator(news.values(*NEWS_FIELDS), per_page).page(request.GET.get('cursor'))
+        return {
+            'results': news_json(page.object_list, taxonomy),
+            'next': page_url(request, cursor=page.next_cursor) if page.has_next() else None,
+            'previous': page_url(request, cursor=page.previous_cursor) if page.has_previous() else None,
+        }
+    return etagged_json(request, build)
+
+
+@require_safe
+def news_detail(request, news_id):
+    """One article as JSON, with its content and syndicated copies."""
+    def build():
+        row = News.objects.filter(id=news_id).values(*NEWS_DETAIL_FIELDS).first()
+        if row is None:
+            return None
+        taxonomy = get_taxonomy()
+        article = news_json([row], taxonomy)[0]
+        article['syndicated_copies'] = [
+            {
+                'title': copy['title'],
+                'url': copy['url'],
+                'published_at': copy['published_at'],
+                'source': {'id': copy['source_id'], 'name': copy['source__name']},
+            }
+            for copy in SyndicatedArticle.objects.filter(news_id=news_id).order_by('published_at')
+            .values('title', 'url', 'published_at', 'source_id', 'source__name')
+        ]
+        return article
+    return etagged_json(request, build)
+
+
+@require_safe
+def categories(request):
+    """All categories with their article counts, as JSON."""
+    return etagged_json(request, lambda: {
+        'results': list(Category.objects.order_by('name').values('id', 'name', 'news_count')),
+    })
+
+
+@require_safe
+def sources(request):
+    """All sources with their article counts, as JSON."""
+    return etagged_json(request, lambda: {
+        'results': list(
+            Source.objects.order_by('name').values('id', 'name', 'website_url', 'country', 'news_count')
+        ),
+    })
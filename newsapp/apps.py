@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class NewsappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'newsapp'
+
+    def ready(self):
+        # Keeps News.category_mask in sync with NewsCategory edits
+        from . import signals  # noqa: F401
@@ -0,0 +1,214 @@
+import hashlib
+import json
+import re
+import string
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Category, News, NewsCategory
+from .pagecache import bump_content_version
+from .taxonomy import invalidate_taxonomy
+
+UNCATEGORIZED = "Uncategorized"
+
+# Keywords used to assign categories to incoming articles
+CATEGORY_KEYWORDS = {
+    "Politics": ["government", "election", "political", "policy", "president", "vote", "democracy", "parliament"],
+    "Technology": ["tech", "technology", "digital", "computer", "software", "hardware", "AI", "artificial intelligence", "app"],
+    "Business": ["business", "economy", "market", "stock", "company", "economic", "finance", "trade", "investor"],
+    "Science": ["science", "scientific", "research", "study", "discovery", "researcher", "laboratory", "experiment"],
+    "Health": ["health", "medical", "doctor", "patient", "disease", "treatment", "hospital", "medicine", "vaccine"],
+    "Entertainment": ["entertainment", "movie", "film", "actor", "actress", "celebrity", "star", "music", "concert"],
+    "Sports": ["sport", "team", "player", "game", "match", "tournament", "championship", "athlete", "coach"],
+    "World": ["world", "international", "global", "foreign", "country", "nation", "worldwide"],
+    "Environment": ["environment", "climate", "pollution", "environmental", "renewable", "sustainable", "ecology", "green"],
+    "Education": ["education", "school", "university", "student", "teacher", "academic", "learning", "college", "classroom"]
+}
+
+
+# Punctuation becomes whitespace, so str.split() yields bare words
+WORD_SEPARATORS = str.maketrans(dict.fromkeys(string.punctuation + '\u2018\u2019\u201c\u201d\u2013\u2014\u2026', ' '))
+
+
+class KeywordCategorizer:
+    """Assign categories to articles from a precomputed keyword vocabulary.
+
+    The text is tokenized once into its set of distinct lower-case words,
+    which is intersected with a vocabulary mapping every keyword (and its
+    plural "s"/"es" forms) to its categories. Keywords therefore match
+    whole words only: "app" matches "apps" but not "happy", "star"
+    matches "stars" but not "start". Multi-word keywords are confirmed
+    with a word-bounded regex, only when their first word occurs.
+    """
+
+    def __init__(self, keywords=None, fallback=UNCATEGORIZED):
+        self.keywords = keywords if keywords is not None else CATEGORY_KEYWORDS
+        self.fallback = fallback
+        self.category_names = list(self.keywords)
+        # Changes whenever the keyword table does, so stored results can be checked for staleness
+        self.version = hashlib.sha1(json.dumps([self.keywords, fallback]).encode()).hexdigest()
+        self.vocabulary = {}
+        self.phrases = {}
+        self._compile(self.keywords)
+
+    def _compile(self, keywords):
+        for index, words in enumerate(keywords.values()):
+            for word in words:
+                parts = word.lower().split()
+                if len(parts) == 1:
+                    for form in (parts[0], parts[0] + 's', parts[0] + 'es'):
+                        self.vocabulary.setdefault(form, set()).add(index)
+                else:
+                    pattern = re.compile(r'\b' + r'\s+'.join(map(re.escape, parts)) + r'(?:e?s)?\b')
+                    self.phrases.setdefault(parts[0], []).append((pattern, index))
+        self.vocabulary_keys = frozenset(self.vocabulary)
+        self.phrase_keys = frozenset(self.phrases)
+
+    def categorize(self, title, content=''):
+        """Return the matching category names in keyword-table order, or the fallback"""
+        text = f"{title} {content}".lower()
+        words = set(text.translate(WORD_SEPARATORS).split())
+
+        found = set()
+        for word in words & self.vocabulary_keys:
+            found.update(self.vocabulary[word])
+        for first_word in words & self.phrase_keys:
+            for pattern, index in self.phrases[first_word]:
+                if index not in found and pattern.search(text):
+                    found.add(index)
+
+        if not found:
+            return [self.fallback]
+        return [self.category_names[index] for index in sorted(found)]
+
+    def categorize_many(self, articles):
+        """Categorize an iterable of (title, content) pairs"""
+        categorize = self.categorize
+        return [categorize(title, content) for title, content in articles]
+
+    def categorize_ids_many(self, articles, category_ids):
+        """Like categorize_many, but return category ids using a name -> id map"""
+        return [[category_ids[name] for name in names] for names in self.categorize_many(articles)]
+
+
+@lru_cache(maxsize=1)
+def get_categorizer():
+    """The process-wide categorizer, compiled on first use"""
+    return KeywordCategorizer()
+
+
+def get_categories(names):
+    """Map category names to Category, creating any that don't exist yet with the lowest free mask bits"""
+    names = set(names)
+    categories = {category.name: category for category in Category.objects.filter(name__in=names)}
+    missing = sorted(names - categories.keys())
+    if missing:
+        bits = Category.free_bits()
+        Category.objects.bulk_create(
+            [Category(name=name, bit=bits[i] if i < len(bits) else None) for i, name in enumerate(missing)],
+            ignore_conflicts=True,
+        )
+        categories.update((category.name, category) for category in Category.objects.filter(name__in=missing))
+        # A concurrent insert may have taken one of the bits; those categories go without one
+        unsaved = [name for name in missing if name not in categories]
+        if unsaved:
+            Category.objects.bulk_create([Category(name=name) for name in unsaved], ignore_conflicts=True)
+            categories.update((category.name, category) for category in Category.objects.filter(name__in=unsaved))
+        # bulk_create sends no signals
+        transaction.on_commit(invalidate_taxonomy)
+    return categories
+
+
+def get_category_ids(names):
+    """Map category names to ids, creating any categories that don't exist yet"""
+    return {name: category.pk for name, category in get_categories(names).items()}
+
+
+def refresh_category_masks(news_ids):
+    """Recompute News.category_mask for the given articles from their NewsCategory rows"""
+    masks = dict.fromkeys(news_ids, 0)
+    if not masks:
+        return
+    for news_id, bit in NewsCategory.objects.filter(
+        news_id__in=list(masks), category__bit__isnull=False,
+    ).values_list('news_id', 'category__bit'):
+        masks[news_id] |= 1 << bit
+    by_mask = defaultdict(list)
+    for news_id, mask in masks.items():
+        by_mask[mask].append(news_id)
+    now = timezone.now()
+    for mask, ids in by_mask.items():
+        News.objects.filter(id__in=ids).update(category_mask=mask, updated_at=now)
+    transaction.on_commit(bump_content_version)
+
+
+def filter_by_categories(queryset, categories):
+    """Restrict News to those in any of ``categories``, without DISTINCT.
+
+    Categories holding many articles are matched with a bit test on
+    category_mask while the feed index is read in order. That test
+    can't use an index: a page fills after about page size / share rows
+    when the category's articles are spread over time, but rows are read
+    until enough match. So categories holding at most
+    NEWS_CATEGORY_LINK_MAX articles (by their counters) are looked up
+    through NewsCategory's (category, news) index instead, and only
+    their own articles are sorted. A large category whose articles are
+    all old can still make the mask test read most of the feed index.
+    """
+    if any(category.bit is None for category in categories):
+        # Categories beyond the mask's bits can only be found through NewsCategory
+        return queryset.filter(categories__in=categories).distinct()
+    if sum(category.news_count for category in categories) <= getattr(settings, 'NEWS_CATEGORY_LINK_MAX', 2000):
+        return queryset.filter(id__in=NewsCategory.objects.filter(category__in=categories).values('news_id'))
+    mask = 0
+    for category in categories:
+        mask |= category.mask
+    return queryset.alias(selected_categories=F('category_mask').bitand(mask)).filter(selected_categories__gt=0)
+
+
+def categories_by_news(masks, categories):
+    """{news id: its categories sorted by name} from {news id: category_mask}.
+
+    NewsCategory is only queried when some category has no mask bit.
+    """
+    categories = sorted(categories, key=lambda category: category.name)
+    unmasked = {category.pk: category for category in categories if category.bit is None}
+    extra = defaultdict(list)
+    if unmasked and masks:
+        for news_id, category_id in NewsCategory.objects.filter(
+            news_id__in=list(masks), category_id__in=list(unmasked),
+        ).values_list('news_id', 'category_id'):
+            extra[news_id].append(unmasked[category_id])
+    return {
+        news_id: [category for category in categories if mask & category.mask] + extra[news_id]
+        for news_id, mask in masks.items()
+    }
+
+
+def attach_categories(news_list, categories):
+    """Set ``category_list`` on each article from its category_mask, sorted by name.
+
+    Replaces prefetching ``categories``.
+    """
+    by_news = categories_by_news({news.pk: news.category_mask for news in news_list}, categories)
+    for news in news_list:
+        news.category_list = by_news[news.pk]
+    return news_list
+
+
+def legacy_categorize(title, content, keywords=None):
+    """The original substring loop, kept as a baseline for bench_categorize"""
+    keywords = keywords if keywords is not None else CATEGORY_KEYWORDS
+    search_text = f"{title} {content}".lower()
+    matched = []
+    for category_name, words in keywords.items():
+        for keyword in words:
+            if keyword.lower() in search_text:
+                matched.append(category_name)
+                break
+    return matched or [UNCATEGORIZED]
@@ -0,0 +1,51 @@
+import hashlib
+
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.views.decorators.http import condition
+
+from .models import News
+from .pagecache import cache_is_shared, cache_version, content_version, page_cache_key
+from .userstate import user_state_version_key
+
+# Part of every ETag; bump it when templates change so browsers don't keep old markup
+PAGE_VERSION = 1
+
+
+def conditional_page(validators=None):
+    """Answer a request whose If-None-Match still matches with a 304 before the view runs.
+
+    The weak ETag is computed without the page's own queries: it
+    combines the path and query string, the content version (bumped by
+    ingest and edits), the user's state version (bookmarks, reads and
+    preferences) and whatever ``validators(request, *args, **kwargs)``
+    returns for data the versions don't cover. Pages for staff (which
+    show job progress) and pages with flash messages are not validated,
+    and no page is while the versions live in a per-process cache that
+    other processes' ingests and edits can't move.
+    """
+    def etag(request, *args, **kwargs):
+        if request.user.is_staff or len(get_messages(request)) or not cache_is_shared():
+            return None
+        parts = [PAGE_VERSION, page_cache_key(request, content_version())]
+        if request.user.is_authenticated:
+            parts += [request.user.pk, cache_version(user_state_version_key(request.user.pk))]
+        if validators:
+            extra = validators(request, *args, **kwargs)
+            if extra is None:
+                return None
+            parts += extra
+        return f'W/"{hashlib.sha1(repr(parts).encode()).hexdigest()}"'
+    return condition(etag_func=etag)
+
+
+def article_validators(request, news_id):
+    """The article's updated_at, its comments' count and newest id and its newest syndicated copy, in one query.
+
+    None if the article doesn't exist.
+    """
+    return News.objects.filter(id=news_id).annotate(
+        comment_count=Count('comment', distinct=True),
+        last_comment_id=Max('comment__id'),
+        last_copy_id=Max('syndicated_copies__id'),
+    ).values_list('updated_at', 'comment_count', 'last_comment_id', 'last_copy_id').first()
@@ -0,0 +1,165 @@
+import hashlib
+import struct
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .categorizer import WORD_SEPARATORS
+from .models import ArticleFingerprint, FingerprintBand
+
+NUM_PERMUTATIONS = 40
+BAND_COUNT = 10
+ROWS_PER_BAND = NUM_PERMUTATIONS // BAND_COUNT
+# Texts with fewer distinct words give unreliable signatures and are never matched
+MIN_WORDS = 8
+
+STOP_WORDS = frozenset("""
+    the and for are but not you all any can had her was one our out has him his how its may new now
+    old see two way who did get let say she too use that with have this will your from they been
+    were said what when into than then them some more also would could which their there about after
+    over other such only most just like while where being these those very
+""".split())
+
+SIGNATURE_FORMAT = f'<{NUM_PERMUTATIONS}I'
+SIGNATURE_BYTES = struct.calcsize(SIGNATURE_FORMAT)
+
+
+def content_words(text):
+    """Distinct lower-case words of a text, without short words and stop words"""
+    return {
+        word for word in text.lower().translate(WORD_SEPARATORS).split()
+        if len(word) > 2 and word not in STOP_WORDS
+    }
+
+
+def minhash(text):
+    """MinHash signature (tuple of NUM_PERMUTATIONS ints) of a text, or None if it is too short.
+
+    Instead of NUM_PERMUTATIONS separate hash functions, each word is
+    hashed once with SHAKE-128 into NUM_PERMUTATIONS independent 32-bit
+    values; the signature is the column-wise minimum over all words.
+    """
+    words = content_words(text)
+    if len(words) < MIN_WORDS:
+        return None
+    rows = [
+        struct.unpack(SIGNATURE_FORMAT, hashlib.shake_128(word.encode()).digest(SIGNATURE_BYTES))
+        for word in words
+    ]
+    return tuple(map(min, zip(*rows)))
+
+
+def band_buckets(signature):
+    """One signed 64-bit bucket id per band of the signature"""
+    buckets = []
+    for band in range(BAND_COUNT):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(struct.pack(f'<B{ROWS_PER_BAND}I', band, *rows), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return buckets
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for a, b in zip(signature, other) if a == b) / NUM_PERMUTATIONS
+
+
+def pack_signature(signature):
+    return struct.pack(SIGNATURE_FORMAT, *signature)
+
+
+def unpack_signature(data):
+    return struct.unpack(SIGNATURE_FORMAT, bytes(data))
+
+
+class NearDuplicateDetector:
+    """Find near-duplicates of incoming articles among recent stored ones.
+
+    Each article gets a MinHash signature over its content words. The
+    signature is cut into BAND_COUNT bands of ROWS_PER_BAND values and
+    each band is hashed to a bucket id (locality-sensitive hashing).
+    Articles with Jaccard similarity around 0.7 share a bucket with
+    probability above 0.9, while unrelated ones almost never do. So
+    candidates for a whole batch come from a single indexed IN lookup on
+    FingerprintBand, and only those are compared.
+
+    Only articles published within ``window_days`` of an incoming one
+    are candidates; ``prune()`` drops fingerprints that have aged out of
+    the window so the bucket index stays the size of the window.
+    Articles stored before fingerprints existed are only matched once
+    ``backfill_fingerprints`` has signed them.
+    """
+
+    def __init__(self, min_similarity=0.7, window_days=7):
+        self.min_similarity = min_similarity
+        self.window = timedelta(days=window_days)
+
+    def signature(self, article):
+        return minhash(f"{article.title} {article.content}")
+
+    def find_duplicates(self, articles):
+        """Sign a batch and match it against stored articles and earlier articles in the batch.
+
+        Returns (signatures, matches), where matches maps the index of each
+        near-duplicate to (news_id, batch_index, similarity). Exactly one
+        of news_id and batch_index is set: the stored article it
+        duplicates, or the earlier article in this batch it duplicates.
+        """
+        signatures = [self.signature(article) for article in articles]
+        article_buckets = [band_buckets(s) if s is not None else () for s in signatures]
+
+        published = [article.published_at for article, s in zip(articles, signatures) if s is not None]
+        candidates = self._candidates(article_buckets, min(published) - self.window) if published else []
+        index = {}
+        for bucket, news_id, data, published_at in candidates:
+            index.setdefault(bucket, []).append((news_id, None, unpack_signature(data), published_at))
+
+        matches = {}
+        for position, (article, signature, buckets) in enumerate(zip(articles, signatures, article_buckets)):
+            if signature is None:
+                continue
+            best = None
+            for bucket in buckets:
+                for news_id, batch_index, other, published_at in index.get(bucket, ()):
+                    if abs(article.published_at - published_at) > self.window:
+                        continue
+                    score = similarity(signature, other)
+                    if score >= self.min_similarity and (best is None or score > best[2]):
+                        best = (news_id, batch_index, score)
+            if best is not None:
+                matches[position] = best
+                continue
+            # Not a duplicate itself, so later articles in the batch may duplicate it
+            for bucket in buckets:
+                index.setdefault(bucket, []).append((None, position, signature, article.published_at))
+        return signatures, matches
+
+    def _candidates(self, article_buckets, cutoff):
+        buckets = {bucket for buckets in article_buckets for bucket in buckets}
+        if not buckets:
+            return []
+        return FingerprintBand.objects.filter(
+            bucket__in=buckets, fingerprint__published_at__gte=cutoff,
+        ).values_list('bucket', 'fingerprint_id', 'fingerprint__signature', 'fingerprint__published_at')
+
+    def prune(self, now=None):
+        """Delete fingerprints (and their buckets) of articles older than the window; return how many"""
+        cutoff = (now or timezone.now()) - self.window
+        # Buckets first, in one statement, so deleting the fingerprints doesn't collect them
+        FingerprintBand.objects.filter(fingerprint__published_at__lt=cutoff).delete()
+        deleted, _ = ArticleFingerprint.objects.filter(published_at__lt=cutoff).delete()
+        return deleted
+
+    def save_signatures(self, news_objects, signatures, batch_size=500):
+        """Store fingerprints and LSH buckets for newly created articles"""
+        fingerprints = []
+        bands = []
+        for news, signature in zip(news_objects, signatures):
+            if signature is None:
+                continue
+            fingerprints.append(ArticleFingerprint(
+                news_id=news.pk, signature=pack_signature(signature), published_at=news.published_at,
+            ))
+            bands.extend(FingerprintBand(bucket=bucket, fingerprint_id=news.pk) for bucket in band_buckets(signature))
+        ArticleFingerprint.objects.bulk_create(fingerprints, batch_size=batch_size)
+        FingerprintBand.objects.bulk_create(bands, batch_size=batch_size)
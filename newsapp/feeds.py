@@ -0,0 +1,177 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from .categorizer import filter_by_categories
+from .models import FeedEntry, News, UserPreference
+from .pagination import CursorPaginator
+
+logger = logging.getLogger(__name__)
+
+
+class FeedSubscription:
+    """What one precomputed feed takes: articles in any of the categories and any of the sources.
+
+    Either side may be empty, meaning any, like the filters on the home
+    page. Categories are matched by their bits in News.category_mask.
+    """
+    __slots__ = ('user_id', 'category_mask', 'source_ids')
+
+    def __init__(self, user_id, category_mask, source_ids):
+        self.user_id = user_id
+        self.category_mask = category_mask
+        self.source_ids = source_ids
+
+    def matches(self, news):
+        return (
+            (not self.category_mask or news.category_mask & self.category_mask)
+            and (not self.source_ids or news.source_id in self.source_ids)
+        )
+
+
+def preferred_news(preference):
+    """News matching the preferences, queried directly; "My feed" of users without precomputed entries"""
+    news = News.objects.select_related('source')
+    categories = list(preference.preferred_categories.all())
+    if categories:
+        news = filter_by_categories(news, categories)
+    source_ids = list(preference.preferred_sources.values_list('id', flat=True))
+    if source_ids:
+        news = news.filter(source__id__in=source_ids)
+    return news
+
+
+def feed_page(user, cursor, per_page=10):
+    """A CursorPage of the user's "My feed" as News (source loaded, content deferred).
+
+    Precomputed feeds read one range of the user's FeedEntry index and
+    join the articles; the others query News like the filtered home page.
+    """
+    preference = UserPreference.objects.filter(user=user).first()
+    if preference is None or not preference.feed_precomputed:
+        news = preferred_news(preference) if preference else News.objects.select_related('source')
+        return CursorPaginator(news.defer('content'), per_page).page(cursor)
+    entries = FeedEntry.objects.filter(user=user).select_related('news__source').defer('news__content')
+    page = CursorPaginator(entries, per_page, tiebreaker='news_id').page(cursor)
+    # Cursors are taken from the page's items, and an article's (published_at, pk) are its entry's
+    page.object_list = [entry.news for entry in page.object_list]
+    return page
+
+
+def should_precompute(preference):
+    """Precompute the feed unless it would take a large share of all articles.
+
+    Broad preferences (or none) would write an entry for most articles
+    ingested, for each such user; their feed is close enough to the
+    main one to be queried from News instead. The share is estimated
+    from the category and source counters.
+    """
+    categories = list(preference.preferred_categories.all())
+    sources = list(preference.preferred_sources.all())
+    if not categories and not sources:
+        return False
+    if any(category.bit is None for category in categories):
+        # Can't be matched by mask at ingest
+        return False
+    total = News.objects.count()
+    if not total:
+        return True
+    estimates = []
+    if categories:
+        estimates.append(sum(category.news_count for category in categories))
+    if sources:
+        estimates.append(sum(source.news_count for source in sources))
+    return min(estimates) / total <= getattr(settings, 'NEWS_FEED_FANOUT_MAX_SHARE', 0.25)
+
+
+def feed_subscriptions():
+    """FeedSubscription of every user whose feed is precomputed"""
+    preferences = (
+        UserPreference.objects.filter(feed_precomputed=True)
+        .prefetch_related('preferred_categories', 'preferred_sources')
+    )
+    subscriptions = []
+    for preference in preferences:
+        mask = 0
+        for category in preference.preferred_categories.all():
+            mask |= category.mask
+        source_ids = {source.pk for source in preference.preferred_sources.all()}
+        subscriptions.append(FeedSubscription(preference.user_id, mask, source_ids))
+    return subscriptions
+
+
+def fan_out(news_list, batch_size=500):
+    """Add newly ingested articles to the precomputed feeds they match; return the entries written.
+
+    The feeds that got entries are trimmed back to NEWS_FEED_MAX_ENTRIES.
+    """
+    subscriptions = feed_subscriptions()
+    if not subscriptions:
+        return 0
+    entries = [
+        FeedEntry(user_id=subscription.user_id, news_id=news.pk, published_at=news.published_at)
+        for news in news_list
+        for subscription in subscriptions
+        if subscription.matches(news)
+    ]
+    FeedEntry.objects.bulk_create(entries, batch_size=batch_size, ignore_conflicts=True)
+    trim_feeds({entry.user_id for entry in entries})
+    return len(entries)
+
+
+def rebuild_feed(preference):
+    """Bring a user's feed in line with changed preferences, writing only the differences.
+
+    Switches between precomputed and queried feeds as needed. A
+    precomputed feed holds the newest NEWS_FEED_MAX_ENTRIES matches.
+    """
+    precompute = should_precompute(preference)
+    with transaction.atomic():
+        if precompute != preference.feed_precomputed:
+            preference.feed_precomputed = precompute
+            preference.save(update_fields=['feed_precomputed'])
+        entries = FeedEntry.objects.filter(user_id=preference.user_id)
+        if not precompute:
+            deleted, _ = entries.delete()
+            return 0, deleted
+
+        limit = getattr(settings, 'NEWS_FEED_MAX_ENTRIES', 1000)
+        wanted = dict(
+            preferred_news(preference).order_by('-published_at', '-id').values_list('id', 'published_at')[:limit]
+        )
+        existing = set(entries.values_list('news_id', flat=True))
+        stale = existing - wanted.keys()
+        if stale:
+            entries.filter(news_id__in=list(stale)).delete()
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(user_id=preference.user_id, news_id=news_id, published_at=published_at)
+                for news_id, published_at in wanted.items() if news_id not in existing
+            ],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+    added = len(wanted.keys() - existing)
+    logger.info(f"Rebuilt feed of user {preference.user_id}: +{added} -{len(stale)}")
+    return added, len(stale)
+
+
+def trim_feeds(user_ids=None):
+    """Drop entries beyond the newest NEWS_FEED_MAX_ENTRIES of the users' feeds (default: all); return how many"""
+    limit = getattr(settings, 'NEWS_FEED_MAX_ENTRIES', 1000)
+    if user_ids is None:
+        user_ids = UserPreference.objects.filter(feed_precomputed=True).values_list('user_id', flat=True)
+    trimmed = 0
+    for user_id in user_ids:
+        entries = FeedEntry.objects.filter(user_id=user_id)
+        # The oldest entry to keep, found by walking the user's index
+        last = entries.order_by('-published_at', '-news_id').values_list('published_at', 'news_id')[limit - 1:limit]
+        if not last:
+            continue
+        published_at, news_id = last[0]
+        deleted, _ = entries.filter(published_at__lte=published_at).exclude(
+            published_at=published_at, news_id__gte=news_id,
+        ).delete()
+        trimmed += deleted
+    return trimmed
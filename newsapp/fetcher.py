@@ -0,0 +1,292 @@
+import hashlib
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .httpcache import CacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Responses worth another attempt after a pause
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - datetime.now(retry_at.tzinfo).timestamp())
+
+
+class FetchRequest:
+    """A single upstream HTTP call to be made by the fetcher"""
+
+    def __init__(self, provider, key, url, params=None, headers=None):
+        self.provider = provider
+        self.key = key
+        self.url = url
+        self.params = params or {}
+        self.headers = headers or {}
+
+    def __repr__(self):
+        return f"<FetchRequest {self.provider}:{self.key}>"
+
+
+class FetchResult:
+    """Outcome of a FetchRequest: decoded JSON data or an error message"""
+
+    def __init__(self, request, status_code=None, data=None, error=None, elapsed=0.0, not_modified=False,
+                 cache_entry=None):
+        self.request = request
+        self.status_code = status_code
+        self.data = data
+        self.error = error
+        self.elapsed = elapsed
+        # True when the response cache showed nothing changed since the last fetch
+        self.not_modified = not_modified
+        # The new response as a CacheEntry, for the caller to store once it has ingested the data
+        self.cache_entry = cache_entry
+
+    @property
+    def ok(self):
+        return self.error is None and self.status_code == 200
+
+
+class ConcurrentFetcher:
+    """Run FetchRequests in parallel over pooled keep-alive sessions.
+
+    Each provider gets its own requests.Session whose connection pool is
+    sized to the provider's concurrency limit, and a semaphore that keeps
+    at most that many of its requests in flight. The whole batch shares a
+    single deadline; anything still running when it expires is reported as
+    timed out instead of holding up the refresh.
+
+    With a ResponseCache, fresh entries are answered from disk and stale
+    ones are revalidated with conditional requests. A 304, or a 200 whose
+    body hashes the same as the cached one, comes back as a result with
+    ``not_modified`` set and no data, so callers can skip all parsing.
+    New responses are not cached by the fetcher: they come back with a
+    ``cache_entry`` that the caller stores with ResponseCache.commit()
+    once their articles are stored, so a failed ingest is retried on
+    the next run instead of being answered from the cache.
+
+    With a ProviderRateLimiter, every request sent takes a token from its
+    provider's bucket; a request that would have to wait past the deadline
+    fails instead. Connection errors, 429 and 5xx responses are retried up
+    to ``max_retries`` times after ``Retry-After`` or a jittered
+    exponential backoff. ``provider_stats`` reports requests spent,
+    throttled and retried per provider.
+    """
+
+    def __init__(self, provider_limits=None, default_limit=2, timeout=10, deadline=30, cache=None,
+                 rate_limiter=None, max_retries=2, backoff=1.0, max_backoff=30):
+        self.provider_limits = dict(provider_limits or {})
+        self.default_limit = default_limit
+        self.timeout = timeout
+        self.deadline = deadline
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._sessions = {}
+        self._semaphores = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def limit_for(self, provider):
+        return max(1, self.provider_limits.get(provider, self.default_limit))
+
+    def session_for(self, provider):
+        """Return the shared keep-alive session for a provider"""
+        with self._lock:
+            session = self._sessions.get(provider)
+            if session is None:
+                limit = self.limit_for(provider)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=limit)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[provider] = session
+                self._semaphores[provider] = threading.BoundedSemaphore(limit)
+            return session
+
+    def backoff_delay(self, attempt):
+        """Full-jitter exponential backoff before retry number ``attempt + 1``"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def provider_stats(self):
+        """Requests spent, throttled and retried so far, by provider"""
+        with self._lock:
+            return {provider: dict(counts) for provider, counts in self._stats.items()}
+
+    def _count(self, provider, outcome):
+        with self._lock:
+            counts = self._stats.setdefault(provider, {'spent': 0, 'throttled': 0, 'retried': 0})
+            counts[outcome] += 1
+
+    def fetch_all(self, fetch_requests):
+        """Fetch every request concurrently and return results in input order"""
+        fetch_requests = list(fetch_requests)
+        if not fetch_requests:
+            return []
+
+        started = time.monotonic()
+        expires_at = started + self.deadline
+        providers = {r.provider for r in fetch_requests}
+        for provider in providers:
+            self.session_for(provider)
+        workers = min(len(fetch_requests), sum(self.limit_for(p) for p in providers))
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fetch')
+        try:
+            futures = [executor.submit(self._fetch_one, r, expires_at) for r in fetch_requests]
+            wait(futures, timeout=max(0.0, expires_at - time.monotonic()))
+            results = []
+            for fetch_request, future in zip(fetch_requests, futures):
+                if future.done():
+                    results.append(future.result())
+                else:
+                    future.cancel()
+                    results.append(FetchResult(
+                        fetch_request,
+                        error=f"Deadline of {self.deadline}s exceeded",
+                        elapsed=time.monotonic() - started,
+                    ))
+            return results
+        finally:
+            # Don't block on stragglers; their per-request timeout bounds them
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch_one(self, fetch_request, expires_at):
+        try:
+            return self._fetch_with_retries(fetch_request, expires_at)
+        finally:
+            if self.rate_limiter is not None:
+                self.rate_limiter.close()
+
+    def _fetch_with_retries(self, fetch_request, expires_at):
+        provider = fetch_request.provider
+        semaphore = self._semaphores[provider]
+        session = self._sessions[provider]
+        started = time.monotonic()
+
+        headers = dict(fetch_request.headers)
+        entry = None
+        if self.cache is not None:
+            cache_key = self.cache.key_for(fetch_request.url, fetch_request.params)
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                if entry.age() < self.cache.ttl:
+                    self.cache.record('hits')
+                    self.cache.touch(cache_key)
+                    return FetchResult(fetch_request, status_code=304, not_modified=True)
+                headers.update(entry.conditional_headers())
+
+        attempt = 0
+        throttled = False
+        while True:
+            if self.rate_limiter is not None:
+                wait_for = self.rate_limiter.acquire(provider)
+                if wait_for > 0:
+                    if not throttled:
+                        throttled = True
+                        self._count(provider, 'throttled')
+                    if time.monotonic() + wait_for >= expires_at:
+                        return FetchResult(fetch_request, elapsed=time.monotonic() - started,
+                                           error=f"Rate limit reached, next request allowed in {wait_for:.0f}s")
+                    time.sleep(wait_for)
+                    continue
+
+            response = error = None
+            with semaphore:
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    return FetchResult(fetch_request, error=f"Deadline of {self.deadline}s exceeded")
+                self._count(provider, 'spent')
+                try:
+                    response = session.get(
+                        fetch_request.url,
+                        params=fetch_request.params,
+                        headers=headers,
+                        timeout=min(self.timeout, remaining),
+                    )
+                except requests.RequestException as e:
+                    error = str(e)
+
+            if response is not None and response.status_code not in RETRY_STATUS_CODES:
+                break
+            retry_after = None
+            if response is not None:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if response.status_code == 429 and retry_after and self.rate_limiter is not None:
+                    # Hold back every process, not just this request
+                    self.rate_limiter.block(provider, retry_after)
+            delay = retry_after if retry_after is not None else self.backoff_delay(attempt)
+            if attempt >= self.max_retries or time.monotonic() + delay >= expires_at:
+                break
+            attempt += 1
+            self._count(provider, 'retried')
+            reason = error or f"HTTP status code {response.status_code}"
+            logger.info(f"Retrying {fetch_request!r} in {delay:.1f}s after {reason}")
+            time.sleep(delay)
+
+        if response is None:
+            return FetchResult(fetch_request, error=error, elapsed=time.monotonic() - started)
+
+        elapsed = time.monotonic() - started
+        cache_entry = None
+        if self.cache is not None:
+            if response.status_code == 304 and entry is not None:
+                self.cache.record('revalidated')
+                self.cache.refresh(cache_key)
+                return FetchResult(fetch_request, status_code=304, elapsed=elapsed, not_modified=True)
+            if response.status_code == 200:
+                if entry is not None and entry.body_hash == hashlib.sha256(response.content).hexdigest():
+                    self.cache.record('unchanged')
+                    self.cache.refresh(cache_key)
+                    return FetchResult(fetch_request, status_code=304, elapsed=elapsed, not_modified=True)
+                self.cache.record('misses')
+                cache_entry = CacheEntry(
+                    cache_key, response.content, hashlib.sha256(response.content).hexdigest(), time.time(),
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified'),
+                )
+
+        if response.status_code != 200:
+            return FetchResult(fetch_request, status_code=response.status_code, elapsed=elapsed,
+                               error=f"HTTP status code {response.status_code}")
+        try:
+            data = response.json()
+        except ValueError as e:
+            return FetchResult(fetch_request, status_code=response.status_code, elapsed=elapsed,
+                               error=f"Invalid JSON response: {str(e)}")
+        return FetchResult(fetch_request, status_code=response.status_code, data=data, elapsed=elapsed,
+                           cache_entry=cache_entry)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._semaphores.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
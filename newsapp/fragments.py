@@ -0,0 +1,74 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .models import News
+from .pagecache import get_cache
+
+logger = logging.getLogger(__name__)
+
+NEWS_CARD = 'newsapp/cards/news_card.html'
+BOOKMARK_ROW = 'newsapp/cards/bookmark_row.html'
+
+# Part of every key; bump it when a card template changes so old fragments aren't served
+CARD_VERSION = 2
+
+
+def card_key(template_name, news):
+    """Cache key of an article's card.
+
+    The article's updated_at covers its own columns and its categories
+    (refresh_category_masks touches it); the source and category names
+    shown on the card live in other tables, so they are hashed in too.
+    """
+    names = '\x1f'.join([news.source.name] + [category.name for category in news.category_list])
+    digest = hashlib.sha1(names.encode()).hexdigest()[:12]
+    return f'newsapp:card:{CARD_VERSION}:{template_name}:{news.id}:{news.updated_at.timestamp()}:{digest}'
+
+
+def attach_cards(news_list, template_name):
+    """Set ``news.card_html`` to each article's rendered card, from the cache where possible.
+
+    All cards of a page are fetched with one get_many; the misses are
+    rendered with one template instance and stored with one set_many.
+    Articles need ``category_list`` (attach_categories) and their
+    source. Search results carry query-specific highlights, so their
+    cards are rendered every time.
+    """
+    cache = get_cache()
+    keys = {
+        news.id: card_key(template_name, news)
+        for news in news_list
+        if not hasattr(news, 'highlighted_title')
+    }
+    cached = cache.get_many(keys.values()) if keys else {}
+    missing = [news for news in news_list if keys.get(news.id) not in cached]
+    load_deferred_content(missing)
+
+    template = get_template(template_name)
+    rendered = {}
+    for news in news_list:
+        key = keys.get(news.id)
+        html = cached.get(key)
+        if html is None:
+            html = template.render({'news': news})
+            if key:
+                rendered[key] = html
+        news.card_html = mark_safe(html)
+    if rendered:
+        cache.set_many(rendered, getattr(settings, 'NEWS_CARD_CACHE_TIMEOUT', 86400))
+    logger.debug(f"Cards from {template_name}: {len(news_list) - len(missing)} cached, {len(missing)} rendered")
+    return news_list
+
+
+def load_deferred_content(news_list):
+    """Load a deferred ``content`` for these articles in one query instead of one per card"""
+    deferred = [news for news in news_list if 'content' in news.get_deferred_fields()]
+    if not deferred:
+        return
+    contents = dict(News.objects.filter(id__in=[news.id for news in deferred]).values_list('id', 'content'))
+    for news in deferred:
+        news.content = contents.get(news.id, '')
@@ -0,0 +1,58 @@
+import logging
+import threading
+
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+
+class HeartbeatLost(Exception):
+    """The claim a heartbeat was keeping alive (a lease, a job) was taken over"""
+
+
+class Heartbeat:
+    """Call ``beat()`` every ``interval`` seconds from a daemon thread while a block of work runs.
+
+    Keeps leases and job claims alive however long the work goes
+    without reporting progress. ``beat`` returns False once the claim
+    has been lost; from then on ``check()`` raises HeartbeatLost, so the
+    work can stop at its next check instead of running alongside
+    whoever took over. Database errors (e.g. SQLite locked by the
+    work's own transaction) are logged and retried at the next beat.
+    """
+
+    def __init__(self, beat, interval, name='heartbeat'):
+        self.beat = beat
+        self.interval = interval
+        self.name = name
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def check(self, *args):
+        """Raise HeartbeatLost if the claim is gone; takes and ignores progress arguments"""
+        if self.lost.is_set():
+            raise HeartbeatLost(f"{self.name} lost")
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    if not self.beat():
+                        logger.warning(f"{self.name} lost")
+                        self.lost.set()
+                        return
+                except DatabaseError:
+                    logger.exception(f"{self.name} failed; retrying in {self.interval:.0f}s")
+        finally:
+            # This thread's connection would otherwise stay open
+            connections.close_all()
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlencode
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry:
+    """A cached response body together with its validators"""
+
+    def __init__(self, key, body, body_hash, stored_at, etag=None, last_modified=None):
+        self.key = key
+        self.body = body
+        self.body_hash = body_hash
+        self.stored_at = stored_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def age(self):
+        return time.time() - self.stored_at
+
+    def conditional_headers(self):
+        """Headers for revalidating this entry with the origin"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Size-bounded on-disk cache of upstream response bodies.
+
+    Each entry is a ``<key>.body`` file next to a ``<key>.json`` file with
+    its validators. Entries younger than ``ttl`` seconds are served
+    without contacting the origin; older ones are revalidated with
+    If-None-Match/If-Modified-Since. When the total size grows beyond
+    ``max_bytes`` the least recently used entries (by file mtime, which is
+    bumped on every hit) are evicted.
+    """
+
+    def __init__(self, directory, ttl=300, max_bytes=50 * 1024 * 1024):
+        self.directory = str(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.unchanged = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key_for(self, url, params=None):
+        """Stable cache key for a URL and its query parameters"""
+        query = urlencode(sorted((params or {}).items()), doseq=True)
+        return hashlib.sha256(f"{url}?{query}".encode()).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + '.json', base + '.body'
+
+    def get(self, key):
+        """Return the CacheEntry for a key, or None"""
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path) as meta_file:
+                meta = json.load(meta_file)
+            with open(body_path, 'rb') as body_file:
+                body = body_file.read()
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(
+            key, body, meta['body_hash'], meta['stored_at'],
+            etag=meta.get('etag'), last_modified=meta.get('last_modified'),
+        )
+
+    def store(self, key, body, etag=None, last_modified=None, url=''):
+        """Write a response body and its validators, then evict if over budget"""
+        meta_path, body_path = self._paths(key)
+        meta = {
+            'url': url,
+            'body_hash': hashlib.sha256(body).hexdigest(),
+            'stored_at': time.time(),
+            'etag': etag,
+            'last_modified': last_modified,
+        }
+        with self._lock:
+            previous = self._entry_size(key)
+            self._write(body_path, body, 'wb')
+            self._write(meta_path, json.dumps(meta), 'w')
+            if self._total_bytes is not None:
+                self._total_bytes += self._entry_size(key) - previous
+            self._evict()
+        return meta['body_hash']
+
+    def commit(self, entry, url=''):
+        """Store an entry built from a fetched response, once its data has been used"""
+        return self.store(entry.key, entry.body, etag=entry.etag, last_modified=entry.last_modified, url=url)
+
+    def refresh(self, key):
+        """Mark an entry as freshly validated by the origin"""
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path) as meta_file:
+                meta = json.load(meta_file)
+            meta['stored_at'] = time.time()
+            self._write(meta_path, json.dumps(meta), 'w')
+            self.touch(key)
+        except (OSError, ValueError):
+            pass
+
+    def touch(self, key):
+        """Bump an entry's mtime so LRU eviction keeps it"""
+        for path in self._paths(key):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+    def record(self, outcome):
+        """Count a lookup outcome: hit, miss, revalidated or unchanged"""
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidated': self.revalidated,
+            'unchanged': self.unchanged,
+            'evictions': self.evictions,
+        }
+
+    def _write(self, path, data, mode):
+        # Write to a temporary file first so readers never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, mode) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _entry_size(self, key):
+        size = 0
+        for path in self._paths(key):
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+        return size
+
+    def _evict(self):
+        if self._total_bytes is None:
+            self._total_bytes = sum(
+                entry.stat().st_size for entry in os.scandir(self.directory) if entry.is_file()
+            )
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        entries = {}
+        for entry in os.scandir(self.directory):
+            key, ext = os.path.splitext(entry.name)
+            if ext in ('.json', '.body'):
+                stat = entry.stat()
+                size, mtime = entries.get(key, (0, 0))
+                entries[key] = (size + stat.st_size, max(mtime, stat.st_mtime))
+
+        for key, (size, mtime) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes -= size
+            self.evictions += 1
+            logger.info(f"Evicted cached response {key}")
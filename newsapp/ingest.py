@@ -0,0 +1,312 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytz
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .categorizer import get_categorizer, get_categories
+from .counters import adjust_news_counts
+from .dedup import NearDuplicateDetector
+from .feeds import fan_out
+from .models import Category, Source, News, NewsCategory, SyndicatedArticle, url_key
+from .pagecache import bump_content_version
+from .taxonomy import invalidate_taxonomy
+
+logger = logging.getLogger(__name__)
+
+
+def clean_content(content):
+    """Remove the truncation marker from content if present."""
+    # Remove [+1234 chars] pattern from the end of content
+    return re.sub(r'\s*\[\+\d+ chars\]$', '', content)
+
+
+def parse_published_at(value):
+    """Parse an API timestamp, falling back to now for missing or malformed values"""
+    if value:
+        try:
+            return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=pytz.UTC)
+        except ValueError:
+            pass
+    return timezone.now()
+
+
+class NormalizedArticle:
+    """Provider-independent representation of an incoming article"""
+
+    __slots__ = (
+        'title', 'content', 'author', 'image_url', 'published_at', 'url', 'url_hash',
+        'source_name', 'source_website_url', 'source_country',
+    )
+
+    def __init__(self, title, content, published_at, url, source_name,
+                 author=None, image_url=None, source_website_url='', source_country='Unknown'):
+        self.title = title
+        self.content = content
+        self.author = author
+        self.image_url = image_url
+        self.published_at = published_at
+        self.url = url
+        self.url_hash = url_key(url)
+        self.source_name = source_name
+        self.source_website_url = source_website_url
+        self.source_country = source_country
+
+    def __repr__(self):
+        return f"<NormalizedArticle {self.title!r}>"
+
+
+class ArticleIngestor:
+    """Write normalized articles to the database in batches.
+
+    Each batch runs in a single transaction: sources and categories are
+    resolved with one IN lookup each, already stored articles (matched by
+    normalized URL or title) are filtered out with one more, and the new News and
+    NewsCategory rows are inserted with bulk_create.
+
+    With a NearDuplicateDetector, articles that are near-duplicates of a
+    recent story are not stored as News; they are linked to it as
+    SyndicatedArticle rows instead.
+
+    New articles are also added to the precomputed feeds they match
+    (newsapp.feeds), in the same transaction.
+
+    Time spent in each stage is accumulated in ``timings`` (seconds by
+    stage name) for benchmarking.
+    """
+
+    def __init__(self, batch_size=500, stdout=None, detector=None):
+        self.batch_size = batch_size
+        self.stdout = stdout
+        self.detector = detector if detector is not None else NearDuplicateDetector()
+        self.created_count = 0
+        self.skipped_count = 0
+        self.duplicate_count = 0
+        self.timings = {}
+
+    def ingest(self, articles):
+        """Ingest an iterable of NormalizedArticle and return the number of new rows"""
+        created = 0
+        batch = []
+        for article in articles:
+            batch.append(article)
+            if len(batch) >= self.batch_size:
+                created += len(self.ingest_batch(batch))
+                batch = []
+        if batch:
+            created += len(self.ingest_batch(batch))
+        return created
+
+    def ingest_batch(self, articles):
+        """Ingest one batch in a single transaction and return the created News"""
+        with self._timed('dedupe'):
+            articles = self._dedupe_batch(articles)
+        if not articles:
+            return []
+
+        with transaction.atomic():
+            with self._timed('dedupe'):
+                articles = self._drop_existing(articles)
+            if not articles:
+                return []
+
+            with self._timed('sources'):
+                sources = self._resolve_sources(articles)
+            with self._timed('near-duplicates'):
+                signatures, duplicates = self.detector.find_duplicates(articles) if self.detector else ([], {})
+            originals = [i for i in range(len(articles)) if i not in duplicates]
+            news_objects = [
+                News(
+                    title=article.title,
+                    content=article.content,
+                    author=article.author,
+                    image_url=article.image_url,
+                    published_at=article.published_at,
+                    source=sources[article.source_name],
+                    is_read=False,
+                    url=article.url,
+                    url_hash=article.url_hash,
+                )
+                for article in (articles[i] for i in originals)
+            ]
+            with self._timed('categorize'):
+                matches = self._categorize(news_objects)
+            with self._timed('insert'):
+                # A concurrent ingest may have stored some of them since _drop_existing
+                News.objects.bulk_create(news_objects, batch_size=self.batch_size, ignore_conflicts=True)
+                self._resolve_inserted(news_objects)
+            created = [news for news in news_objects if news.pk is not None]
+            matches = [matched for news, matched in zip(news_objects, matches) if news.pk is not None]
+            self.skipped_count += len(news_objects) - len(created)
+            with self._timed('categorize'):
+                self._link_categories(created, matches)
+            with self._timed('counters'):
+                self._count_news(created, matches)
+            with self._timed('feeds'):
+                fan_out(created, batch_size=self.batch_size)
+            if self.detector:
+                with self._timed('link'):
+                    duplicates = self._link_duplicates(articles, sources, originals, news_objects, signatures, duplicates)
+            if created or duplicates:
+                # Cached pages are replaced once the new articles (or new "also reported by" links) are visible
+                transaction.on_commit(bump_content_version)
+
+        self.created_count += len(created)
+        self.duplicate_count += len(duplicates)
+        if self.stdout:
+            for news in created:
+                self.stdout.write(f"Created news article: {news.title}")
+            for index in duplicates:
+                self.stdout.write(f"Linked near-duplicate article: {articles[index].title}")
+        return created
+
+    @contextmanager
+    def _timed(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - started
+
+    def _dedupe_batch(self, articles):
+        """Drop articles repeated within the batch itself (same normalized URL or title)"""
+        seen_urls = set()
+        seen_titles = set()
+        unique = []
+        for article in articles:
+            if article.title in seen_titles or (article.url_hash and article.url_hash in seen_urls):
+                self.skipped_count += 1
+                continue
+            seen_titles.add(article.title)
+            if article.url_hash:
+                seen_urls.add(article.url_hash)
+            unique.append(article)
+        return unique
+
+    def _drop_existing(self, articles):
+        """Filter out articles already stored, using one IN lookup on the indexed url_hash and title"""
+        urls = [a.url_hash for a in articles if a.url_hash]
+        titles = [a.title for a in articles]
+        existing = News.objects.filter(Q(url_hash__in=urls) | Q(title__in=titles)).values_list('url_hash', 'title')
+        existing_urls = set()
+        existing_titles = set()
+        for url, title in existing:
+            existing_urls.add(url)
+            existing_titles.add(title)
+
+        fresh = [
+            a for a in articles
+            if a.title not in existing_titles and not (a.url_hash and a.url_hash in existing_urls)
+        ]
+        self.skipped_count += len(articles) - len(fresh)
+        return fresh
+
+    def _resolve_sources(self, articles):
+        """Map source name to Source, bulk-creating the ones we haven't seen"""
+        wanted = {}
+        for article in articles:
+            wanted.setdefault(article.source_name, article)
+
+        sources = {}
+        for source in Source.objects.filter(name__in=list(wanted)).order_by('id'):
+            sources.setdefault(source.name, source)
+
+        missing = [
+            Source(
+                name=name,
+                website_url=article.source_website_url or f"https://{name.lower().replace(' ', '')}.com",
+                country=article.source_country,
+            )
+            for name, article in wanted.items() if name not in sources
+        ]
+        if missing:
+            Source.objects.bulk_create(missing)
+            # bulk_create sends no signals
+            transaction.on_commit(invalidate_taxonomy)
+            for source in Source.objects.filter(name__in=[s.name for s in missing]).order_by('id'):
+                sources.setdefault(source.name, source)
+            if self.stdout:
+                for source in missing:
+                    self.stdout.write(f"Created source: {source.name}")
+        return sources
+
+    def _resolve_inserted(self, news_objects):
+        """Set the pk of each article this insert stored, and None on those a concurrent ingest stored first.
+
+        Inserts that ignore conflicts don't return ids. Rows are looked up
+        by URL key or title, and told apart from another ingest's copy of
+        the same article by created_at, which bulk_create set on each
+        object to the microsecond.
+        """
+        ids = {
+            (title, created_at): pk
+            for pk, title, created_at in News.objects.filter(
+                Q(url_hash__in=[news.url_hash for news in news_objects if news.url_hash])
+                | Q(title__in=[news.title for news in news_objects])
+            ).values_list('id', 'title', 'created_at')
+        }
+        for news in news_objects:
+            news.pk = ids.get((news.title, news.created_at))
+
+    def _count_news(self, created, matches):
+        """Add the new articles to their sources' and categories' counters (bulk_create sends no signals)"""
+        adjust_news_counts(Source, Counter(news.source_id for news in created))
+        adjust_news_counts(Category, Counter(category.pk for matched in matches for category in matched))
+
+    def _link_duplicates(self, articles, sources, originals, news_objects, signatures, duplicates):
+        """Store signatures of the new stories and attach their near-duplicates to them; return the duplicates linked"""
+        news_by_index = dict(zip(originals, news_objects))
+        stored = [(news, signatures[i]) for i, news in news_by_index.items() if news.pk is not None]
+        self.detector.save_signatures(
+            [news for news, _ in stored], [signature for _, signature in stored], batch_size=self.batch_size,
+        )
+        # Copies of a story another ingest stored first are left to that ingest's duplicates
+        duplicates = {
+            index: match for index, match in duplicates.items()
+            if match[0] is not None or news_by_index[match[1]].pk is not None
+        }
+        SyndicatedArticle.objects.bulk_create(
+            [
+                SyndicatedArticle(
+                    news_id=news_id if news_id is not None else news_by_index[batch_index].pk,
+                    source=sources[articles[index].source_name],
+                    title=articles[index].title[:255],
+                    url=articles[index].url,
+                    published_at=articles[index].published_at,
+                    similarity=score,
+                )
+                for index, (news_id, batch_index, score) in duplicates.items()
+            ],
+            batch_size=self.batch_size,
+        )
+        return duplicates
+
+    def _categorize(self, news_objects):
+        """Categorize articles before they are inserted, setting their category_mask; return the Categories per article"""
+        names = get_categorizer().categorize_many((news.title, news.content) for news in news_objects)
+        categories = get_categories(name for article_names in names for name in article_names)
+        matches = []
+        for news, article_names in zip(news_objects, names):
+            matched = [categories[name] for name in article_names]
+            for category in matched:
+                news.category_mask |= category.mask
+            matches.append(matched)
+        return matches
+
+    def _link_categories(self, created, matches):
+        """Bulk insert NewsCategory rows for the newly created articles"""
+        NewsCategory.objects.bulk_create(
+            [
+                NewsCategory(news_id=news.pk, category_id=category.pk)
+                for news, matched in zip(created, matches)
+                for category in matched
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
@@ -0,0 +1,159 @@
+import json
+import logging
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .heartbeat import Heartbeat, HeartbeatLost
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Job handlers by kind
+JOB_HANDLERS = {}
+
+
+def register_job(kind):
+    """Decorator registering ``handler(job, **arguments)`` for a kind of job; it returns the result dict"""
+    def decorator(handler):
+        JOB_HANDLERS[kind] = handler
+        return handler
+    return decorator
+
+
+def job_key(kind, arguments):
+    return f"{kind}:{json.dumps(arguments, sort_keys=True)}"
+
+
+def enqueue(kind, **arguments):
+    """Queue a job and return it, or return the queued/running job doing the same work.
+
+    A partial unique index on in-flight jobs' keys makes the check
+    race-free: of two concurrent enqueues, the second insert fails and
+    picks up the first one's job.
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind '{kind}'")
+    key = job_key(kind, arguments)
+    existing = Job.objects.filter(key=key, status__in=Job.IN_FLIGHT).first()
+    if existing is not None:
+        return existing
+    try:
+        with transaction.atomic():
+            return Job.objects.create(kind=kind, key=key, arguments=arguments)
+    except IntegrityError:
+        existing = Job.objects.filter(key=key, status__in=Job.IN_FLIGHT).first()
+        if existing is None:
+            # The other job finished in between; queue a fresh one
+            return Job.objects.create(kind=kind, key=key, arguments=arguments)
+        return existing
+
+
+def claim_next(worker):
+    """Atomically take the oldest queued job for ``worker``, or return None"""
+    for job in Job.objects.filter(status=Job.QUEUED).order_by('created_at', 'id')[:10]:
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, worker=worker, started_at=now, heartbeat_at=now,
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def report_progress(job, progress, message=''):
+    """Record how far a running job has got; handlers call this as they go.
+
+    Raises HeartbeatLost once the job has been failed as stale, so its
+    handler stops instead of running alongside a retry.
+    """
+    if getattr(job, 'heartbeat', None) is not None:
+        job.heartbeat.check()
+    job.progress = max(0.0, min(1.0, progress))
+    job.message = message[:255]
+    job.heartbeat_at = timezone.now()
+    Job.objects.filter(pk=job.pk, status=Job.RUNNING, worker=job.worker).update(
+        progress=job.progress, message=job.message, heartbeat_at=job.heartbeat_at,
+    )
+
+
+def keep_alive(job):
+    """Bump a running job's heartbeat_at; False once it is no longer ours to run"""
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, worker=job.worker).update(
+        heartbeat_at=timezone.now(),
+    ) > 0
+
+
+def run_job(job):
+    """Run a claimed job with its handler and store the outcome, unless the job was taken over meanwhile.
+
+    A heartbeat thread keeps heartbeat_at current however long the
+    handler goes between progress reports, so only jobs whose worker
+    died look stale to fail_stale_jobs.
+    """
+    handler = JOB_HANDLERS.get(job.kind)
+    job.heartbeat = Heartbeat(
+        lambda: keep_alive(job), getattr(settings, 'NEWS_JOB_TIMEOUT', 900) / 3, name=f'Heartbeat of {job}',
+    )
+    try:
+        if handler is None:
+            raise ValueError(f"No handler for job kind '{job.kind}'")
+        with job.heartbeat:
+            result = handler(job, **job.arguments) or {}
+    except HeartbeatLost:
+        # Already failed as stale, and possibly queued again; the row isn't ours anymore
+        logger.warning(f"Job {job} was taken over while running; stopped")
+        return job
+    except Exception as e:
+        logger.exception(f"Job {job} failed")
+        job.status = Job.FAILED
+        job.error = str(e)
+    else:
+        job.status = Job.DONE
+        job.result = result
+        job.progress = 1.0
+    job.finished_at = timezone.now()
+    try:
+        job.heartbeat.check()
+    except HeartbeatLost:
+        finished = 0
+    else:
+        # Only while the row is still ours: a stale-failed job may have been queued or claimed again
+        finished = Job.objects.filter(pk=job.pk, status=Job.RUNNING, worker=job.worker).update(
+            status=job.status, error=job.error, result=job.result, progress=job.progress,
+            finished_at=job.finished_at,
+        )
+    if not finished:
+        logger.warning(f"Job {job} was taken over while running; dropped its result")
+    return job
+
+
+def fail_stale_jobs(timeout):
+    """Mark running jobs whose worker stopped reporting for ``timeout`` seconds as failed"""
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=cutoff).update(
+        status=Job.FAILED, error='Worker stopped responding', finished_at=timezone.now(),
+    )
+
+
+@register_job('fetch_news')
+def fetch_news_job(job, providers=None, mock=False):
+    """Run fetch_news, reporting progress per provider and the number of articles added"""
+    # Imported here so importing jobs (views do) doesn't load the whole fetch stack
+    from .management.commands.fetch_news import Command as FetchNewsCommand
+
+    command = FetchNewsCommand(stdout=StringIO())
+    options = {'mock': mock, 'progress': lambda fraction, message: report_progress(job, fraction, message)}
+    if providers:
+        options['providers'] = providers
+    call_command(command, **options)
+    return {
+        'articles_added': command.ingestor.created_count,
+        'duplicates_linked': command.ingestor.duplicate_count,
+        'skipped': command.ingestor.skipped_count,
+    }
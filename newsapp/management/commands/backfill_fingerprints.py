@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from newsapp.dedup import NearDuplicateDetector
+from newsapp.models import News
+
+class Command(BaseCommand):
+    help = 'Stores near-duplicate fingerprints for recent articles that have none, e.g. ones stored before deduplication'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Articles per chunk')
+
+    def handle(self, *args, **options):
+        detector = NearDuplicateDetector()
+        # Older articles would be pruned again at the next fetch
+        news = News.objects.filter(
+            published_at__gte=timezone.now() - detector.window, fingerprint__isnull=True,
+        ).only('id', 'title', 'content', 'published_at').order_by('pk')
+
+        signed = 0
+        last_pk = 0
+        while True:
+            chunk = list(news.filter(pk__gt=last_pk)[:options['chunk_size']])
+            if not chunk:
+                break
+            signatures = [detector.signature(article) for article in chunk]
+            # A fingerprint is never stored without its buckets
+            with transaction.atomic():
+                detector.save_signatures(chunk, signatures)
+            signed += sum(1 for signature in signatures if signature is not None)
+            last_pk = chunk[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(f'Stored fingerprints for {signed} articles'))
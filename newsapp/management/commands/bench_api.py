@@ -0,0 +1,60 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from newsapp.models import Category, News
+from newsapp.pagecache import bump_content_version
+
+class Command(BaseCommand):
+    help = 'Benchmarks the JSON API against the HTML views it mirrors'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=30, help='Requests per endpoint and mode')
+
+    def handle(self, *args, **options):
+        news_id = News.objects.order_by('-published_at', '-id').values_list('id', flat=True).first()
+        if news_id is None:
+            self.stdout.write(self.style.WARNING('No articles to request.'))
+            return
+        category_id = Category.objects.exclude(bit=None).order_by('-news_count').values_list('id', flat=True).first()
+        pairs = [
+            ('feed', '/', '/api/news/'),
+            ('feed, category', f'/?categories={category_id}', f'/api/news/?categories={category_id}'),
+            ('article', f'/news/{news_id}/', f'/api/news/{news_id}/'),
+            ('categories', '/categories/', '/api/categories/'),
+            ('sources', '/sources/', '/api/sources/'),
+        ]
+
+        # Anonymous requests, so the HTML views are the same for every client as the API is
+        client = Client()
+        self.requests = options['requests']
+        self.stdout.write(f"{'':16}{'HTML':>16}{'JSON':>16}{'JSON cached':>16}{'JSON 304':>16}")
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for name, html_url, api_url in pairs:
+                # Uncached: a new content version before each request, as after an ingest
+                html = self.measure(client, html_url, invalidate=True)
+                api = self.measure(client, api_url, invalidate=True)
+                cached = self.measure(client, api_url)
+                etag = client.get(api_url)['ETag']
+                not_modified = self.measure(client, api_url, HTTP_IF_NONE_MATCH=etag)
+                self.stdout.write(f"{name:16}" + ''.join(
+                    f"{median:>8.2f} ms {queries:>2}q" for median, queries, _ in (html, api, cached, not_modified)
+                ))
+                self.stdout.write(f"{'':16}" + ''.join(
+                    f"{size:>13,} B" for _, _, size in (html, api, cached, not_modified)
+                ))
+        self.stdout.write(self.style.SUCCESS('Benchmark completed!'))
+
+    def measure(self, client, url, invalidate=False, **headers):
+        """(median ms, queries of the last request, body bytes) over the requests"""
+        timings = []
+        for _ in range(self.requests):
+            if invalidate:
+                bump_content_version()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(url, **headers)
+                timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), len(queries), len(response.content)
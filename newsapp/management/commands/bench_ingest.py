@@ -0,0 +1,119 @@
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from newsapp.ingest import ArticleIngestor
+from newsapp.providers import ProviderError, get_provider
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+class QueryCounter:
+    """Database execute wrapper counting queries and the time spent in them"""
+
+    def __init__(self):
+        self.count = 0
+        self.elapsed = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.elapsed += time.perf_counter() - started
+
+class Command(BaseCommand):
+    help = 'Benchmarks article ingestion with generated articles from the synthetic provider'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=10000, help='Number of articles to generate')
+        parser.add_argument('--batch-size', type=int, default=500, help='Articles per ingest transaction')
+        parser.add_argument('--rate', type=float, default=0,
+                            help='Generate at most this many articles per second (0 = as fast as possible)')
+        parser.add_argument('--duplicate-ratio', type=float, default=0.05,
+                            help='Fraction of articles that are exact re-sends of a recent one')
+        parser.add_argument('--syndicated-ratio', type=float, default=0.05,
+                            help='Fraction of articles that are reworded copies from another source')
+        parser.add_argument('--categories', help='Category weights, e.g. "Politics=3,Sports=1,Uncategorized=1"')
+        parser.add_argument('--seed', type=int, help='Seed for a reproducible article stream')
+        parser.add_argument('--rollback', action='store_true',
+                            help='Discard everything written once the benchmark is done')
+
+    def handle(self, *args, **options):
+        try:
+            provider = get_provider(
+                'synthetic',
+                count=options['articles'],
+                rate=options['rate'],
+                duplicate_ratio=options['duplicate_ratio'],
+                syndicated_ratio=options['syndicated_ratio'],
+                categories=options['categories'],
+                seed=options['seed'],
+            )
+        except ProviderError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"Ingesting {options['articles']:,} synthetic articles in batches of {options['batch_size']}...")
+        ingestor = ArticleIngestor(batch_size=options['batch_size'])
+        queries = QueryCounter()
+        self.generate_time = 0.0
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            if options['rollback']:
+                with transaction.atomic():
+                    self.run(provider, ingestor)
+                    transaction.set_rollback(True)
+            else:
+                self.run(provider, ingestor)
+        elapsed = time.perf_counter() - started
+
+        total = options['articles']
+        self.stdout.write(f"Ingested {total:,} articles in {elapsed:.2f}s ({total / elapsed:,.0f} articles/s)")
+        self.stdout.write(
+            f"Created {ingestor.created_count:,}, skipped {ingestor.skipped_count:,} exact duplicates, "
+            f"linked {ingestor.duplicate_count:,} near-duplicates"
+        )
+        self.stdout.write(
+            f"Queries: {queries.count:,} ({queries.count / total:.3f} per article), "
+            f"database time {queries.elapsed:.2f}s"
+        )
+        self.stdout.write(f"Peak RSS: {self.peak_rss()}")
+
+        stages = dict(generate=self.generate_time, **ingestor.timings)
+        stages['commit and other'] = max(0.0, elapsed - sum(stages.values()))
+        self.stdout.write('Stage timings:')
+        for stage, seconds in stages.items():
+            self.stdout.write(f"  {stage:<18} {seconds:8.3f}s {seconds / elapsed:6.1%}")
+        if options['rollback']:
+            self.stdout.write(self.style.WARNING('Rolled back all written rows.'))
+        self.stdout.write(self.style.SUCCESS('Benchmark completed!'))
+
+    def run(self, provider, ingestor):
+        for source_key, articles in provider.responses([]):
+            ingestor.ingest(self.timed(articles))
+
+    def timed(self, articles):
+        """Pass articles through, adding the time spent producing them to generate_time"""
+        articles = iter(articles)
+        while True:
+            started = time.perf_counter()
+            try:
+                article = next(articles)
+            except StopIteration:
+                return
+            finally:
+                self.generate_time += time.perf_counter() - started
+            yield article
+
+    def peak_rss(self):
+        if resource is None:
+            return 'n/a'
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        if sys.platform != 'darwin':
+            peak *= 1024
+        return f"{peak / (1024 * 1024):.1f} MB"
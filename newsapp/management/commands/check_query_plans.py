@@ -0,0 +1,112 @@
+import re
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test import override_settings
+from django.utils import timezone
+from newsapp.categorizer import filter_by_categories
+from newsapp.dedup import NearDuplicateDetector
+from newsapp.models import Category, FeedEntry, News, Source, url_key
+from newsapp.pagination import CursorPaginator
+
+# Tables the hot queries must never read in full
+CHECKED_TABLES = (
+    'newsapp_news', 'newsapp_newscategory', 'newsapp_feedentry',
+    'newsapp_fingerprintband', 'newsapp_articlefingerprint',
+)
+
+class Command(BaseCommand):
+    help = 'Runs EXPLAIN on the feed, filter and ingest queries and fails if one scans a whole table or index, or sorts'
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f"Query plans can't be checked on {connection.vendor}")
+
+        categories = list(Category.objects.exclude(bit=None)[:2])
+        source_id = Source.objects.values_list('id', flat=True).first() or 0
+        feed = News.objects.select_related('source').order_by('-published_at')
+        paginator = CursorPaginator(feed, 10)
+        entries = FeedEntry.objects.filter(user_id=0).select_related('news__source')
+        entry_paginator = CursorPaginator(entries, 10, tiebreaker='news_id')
+        # Both ways filter_by_categories can go, whatever the counters of these categories say
+        with override_settings(NEWS_CATEGORY_LINK_MAX=float('inf')):
+            small_categories = filter_by_categories(feed, categories).order_by('-published_at', '-id')[:11]
+        with override_settings(NEWS_CATEGORY_LINK_MAX=-1):
+            large_categories = filter_by_categories(feed, categories).order_by('-published_at', '-id')[:11]
+        checks = [
+            # (name, queryset, whether the order has to come from an index,
+            #  table the query is expected to walk in index order testing each row, or None)
+            ('feed, first page', feed.order_by('-published_at', '-id')[:11], True, None),
+            ('feed, older page', paginator.keyset('next', timezone.now(), 1)[:11], True, None),
+            ('feed, newer page', paginator.keyset('prev', timezone.now(), 1)[:11], True, None),
+            ('source filter', feed.filter(source__id__in=[source_id]).order_by('-published_at', '-id')[:11], True, None),
+            # Looks the articles up in NewsCategory's index and sorts only those
+            ('category filter, small categories', small_categories, False, None),
+            # The mask test can't use an index; it reads the feed index until a page matches
+            ('category filter, large categories', large_categories, True, 'newsapp_news'),
+            ('my feed, first page', entries.order_by('-published_at', '-news_id')[:11], True, None),
+            ('my feed, older page', entry_paginator.keyset('next', timezone.now(), 1)[:11], True, None),
+            ('ingest dedupe', News.objects.filter(
+                Q(url_hash__in=[url_key('https://example.com/a')]) | Q(title__in=['Example title'])
+            ).values_list('url_hash', 'title'), False, None),
+            ('near-duplicate candidates', NearDuplicateDetector()._candidates([[1, 2]], timezone.now()), False, None),
+        ]
+
+        failures = 0
+        for name, queryset, ordered, walked_table in checks:
+            plan = self.explain(queryset)
+            problems = self.problems(plan, queryset, ordered, walked_table)
+            if problems:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f"{name}: {'; '.join(problems)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{name}: OK"))
+            if problems or self.verbosity >= 2:
+                self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(f"{failures} of {len(checks)} queries don't use an index as expected")
+
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            # Small tables make PostgreSQL prefer sequential scans; discourage them to see
+            # whether a usable index exists at all
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+                    cursor.execute('SET LOCAL enable_sort = off')
+                return queryset.explain()
+        return queryset.explain()
+
+    def problems(self, plan, queryset, ordered, walked_table):
+        """What is wrong with a plan: full scans of the checked tables, and sorting where an index should order.
+
+        On SQLite a SCAN through an index reads the whole index too. It
+        is only accepted where the query stops early and tests nothing
+        per row (a LIMIT and no WHERE, like the first feed page), or
+        where the check expects exactly that walk.
+        """
+        problems = []
+        stops_early = queryset.query.high_mark is not None and not queryset.query.where
+        for table in CHECKED_TABLES:
+            if connection.vendor == 'sqlite':
+                scan = re.search(rf'\bSCAN {table}\b( USING (COVERING )?INDEX)?', plan)
+                if scan and scan.group(1) and (stops_early or table == walked_table):
+                    scan = None
+                if scan:
+                    problems.append(f"{'full index scan' if scan.group(1) else 'full scan'} of {table}")
+            elif re.search(rf'\bSeq Scan on {table}\b', plan):
+                problems.append(f"full scan of {table}")
+        if walked_table and connection.vendor == 'sqlite' and not re.search(
+            rf'\bSCAN {walked_table} USING (COVERING )?INDEX\b', plan,
+        ):
+            problems.append(f"expected to walk an index of {walked_table} in order")
+        if ordered:
+            if connection.vendor == 'sqlite':
+                sorted_in_memory = 'TEMP B-TREE FOR ORDER BY' in plan or 'TEMP B-TREE FOR RIGHT PART OF ORDER BY' in plan
+            else:
+                sorted_in_memory = re.search(r'^\s*(->\s*)?(Incremental )?Sort\b', plan, re.MULTILINE)
+            if sorted_in_memory:
+                problems.append("sorts rows instead of reading them in index order")
+        return problems
@@ -0,0 +1,175 @@
+import os
+import signal
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from newsapp.categorizer import get_categorizer, get_category_ids
+from newsapp.models import BackfillCheckpoint, Category, News, NewsCategory
+from newsapp.signals import category_links_changed, deferred_category_updates, news_counts_changed
+
+CHECKPOINT_NAME = 'recategorize'
+
+
+def init_worker():
+    """Worker setup: leave Ctrl-C to the parent, and configure Django under the spawn start method"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    django.setup()
+
+
+def classify_chunk(rows):
+    """Worker: categorize (pk, title, content) rows, returning (pk, category names) pairs"""
+    categorizer = get_categorizer()
+    return [(pk, categorizer.categorize(title, content)) for pk, title, content in rows]
+
+
+class Command(BaseCommand):
+    help = 'Re-runs keyword categorization over all stored news and applies only the changed categories'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Articles per chunk')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Classifier processes (1 = classify in this process)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report how many rows would change; write nothing')
+        parser.add_argument('--restart', action='store_true',
+                            help='Start from the first article instead of resuming from the checkpoint')
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.verbosity = options['verbosity']
+        version = get_categorizer().version
+        checkpoint = (
+            BackfillCheckpoint.objects.filter(name=CHECKPOINT_NAME).first()
+            or BackfillCheckpoint(name=CHECKPOINT_NAME)
+        )
+        if options['restart'] or checkpoint.version != version or self.dry_run:
+            # A dry run always looks at the whole table
+            start_pk = 0
+        elif checkpoint.completed:
+            self.stdout.write(self.style.SUCCESS(
+                'Categories are already up to date with the current keywords. Use --restart to run again.'
+            ))
+            return
+        else:
+            start_pk = checkpoint.last_pk
+            if start_pk:
+                self.stdout.write(f"Resuming after news id {start_pk}")
+        if not self.dry_run:
+            checkpoint.version = version
+            checkpoint.last_pk = start_pk
+            checkpoint.completed = False
+            checkpoint.save()
+        self.checkpoint = checkpoint
+
+        self.category_ids = dict(Category.objects.values_list('name', 'id'))
+        self.processed = self.changed = self.added = self.removed = 0
+        started = time.perf_counter()
+
+        workers = max(1, options['workers'])
+        chunks = self.read_chunks(start_pk, options['chunk_size'])
+        try:
+            if workers == 1:
+                for rows in chunks:
+                    self.apply(rows, classify_chunk(rows))
+            else:
+                self.run_pool(chunks, workers)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING(
+                f"Interrupted after news id {checkpoint.last_pk}. Run the command again to resume."
+            ))
+            return
+
+        if not self.dry_run:
+            checkpoint.completed = True
+            checkpoint.save()
+
+        elapsed = time.perf_counter() - started
+        summary = (
+            f"{self.processed} articles in {elapsed:.1f}s: {self.changed} changed, "
+            f"{self.added} category links added, {self.removed} removed"
+        )
+        if self.dry_run:
+            self.stdout.write(self.style.WARNING(f"Dry run, nothing written. Would update {summary}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Recategorized {summary}"))
+
+    def read_chunks(self, start_pk, chunk_size):
+        """Yield lists of (pk, title, content) in primary key order, one keyset query per chunk"""
+        last_pk = start_pk
+        while True:
+            rows = list(
+                News.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'title', 'content')[:chunk_size]
+            )
+            if not rows:
+                return
+            yield rows
+            last_pk = rows[-1][0]
+
+    def run_pool(self, chunks, workers):
+        """Classify chunks in a process pool, applying results in primary key order"""
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+        pending = deque()
+        try:
+            for rows in chunks:
+                pending.append((rows, pool.submit(classify_chunk, rows)))
+                # Keep the workers busy without reading the whole table ahead
+                if len(pending) >= workers * 2:
+                    rows, future = pending.popleft()
+                    self.apply(rows, future.result())
+            while pending:
+                rows, future = pending.popleft()
+                self.apply(rows, future.result())
+        finally:
+            # Results not applied yet are simply recomputed on resume
+            pool.shutdown(cancel_futures=True)
+
+    def apply(self, rows, results):
+        """Diff one chunk's categories against NewsCategory and write only the differences"""
+        first_pk, last_pk = rows[0][0], rows[-1][0]
+        existing = {}
+        for link_id, news_id, category_id in NewsCategory.objects.filter(
+            news_id__gte=first_pk, news_id__lte=last_pk,
+        ).values_list('id', 'news_id', 'category_id'):
+            existing[(news_id, category_id)] = link_id
+
+        missing_names = {name for _, names in results for name in names} - set(self.category_ids)
+        if missing_names and not self.dry_run:
+            self.category_ids.update(get_category_ids(missing_names))
+
+        wanted = set()
+        for news_id, names in results:
+            for name in names:
+                # In a dry run new categories have no id yet; their name stands in for it
+                wanted.add((news_id, self.category_ids.get(name, name)))
+        to_add = wanted - existing.keys()
+        removed_keys = existing.keys() - wanted
+        to_remove = [existing[key] for key in removed_keys]
+        changed = {news_id for news_id, _ in to_add} | {news_id for news_id, _ in removed_keys}
+
+        if not self.dry_run:
+            # Masks and counters of the changed links are updated once at the end, not per link
+            with transaction.atomic(), deferred_category_updates():
+                if to_remove:
+                    NewsCategory.objects.filter(id__in=to_remove).delete()
+                if to_add:
+                    NewsCategory.objects.bulk_create(
+                        [NewsCategory(news_id=news_id, category_id=category_id) for news_id, category_id in to_add],
+                        ignore_conflicts=True,
+                    )
+                    # bulk_create sends no signals
+                    category_links_changed({news_id for news_id, _ in to_add})
+                    news_counts_changed(Category, Counter(category_id for _, category_id in to_add))
+                # Advance the checkpoint in the same transaction as the changes it covers
+                self.checkpoint.last_pk = last_pk
+                self.checkpoint.save(update_fields=['last_pk', 'updated_at'])
+
+        self.processed += len(rows)
+        self.changed += len(changed)
+        self.added += len(to_add)
+        self.removed += len(to_remove)
+        if self.verbosity >= 2:
+            self.stdout.write(f"News {first_pk}-{last_pk}: +{len(to_add)} -{len(to_remove)}")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from newsapp.counters import recount_news
+from newsapp.models import Category, Source
+from newsapp.pagecache import bump_content_version
+
+class Command(BaseCommand):
+    help = 'Recomputes the article counters of categories and sources exactly and reports any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        fixed = 0
+        for model in (Category, Source):
+            drift = recount_news(model, dry_run=dry_run)
+            names = dict(model.objects.filter(pk__in=list(drift)).values_list('pk', 'name'))
+            for pk, (stored, exact) in sorted(drift.items()):
+                self.stdout.write(self.style.WARNING(
+                    f"{model._meta.verbose_name} {names.get(pk, pk)}: stored {stored}, actual {exact}"
+                ))
+            fixed += len(drift)
+            self.stdout.write(f"{model._meta.verbose_name_plural.capitalize()}: {len(drift)} counters off")
+
+        if not fixed:
+            self.stdout.write(self.style.SUCCESS('All counters are exact'))
+        elif dry_run:
+            self.stdout.write(self.style.WARNING(f'{fixed} counters off (dry run, nothing changed)'))
+        else:
+            # The categories and sources pages show these numbers
+            bump_content_version()
+            self.stdout.write(self.style.SUCCESS(f'Fixed {fixed} counters'))
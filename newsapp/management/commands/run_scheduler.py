@@ -0,0 +1,52 @@
+import os
+import signal
+import socket
+import threading
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from newsapp.providers import PROVIDERS
+from newsapp.scheduler import RefreshScheduler, get_schedules
+
+class Command(BaseCommand):
+    help = 'Runs scheduled news refreshes; start one or more, only the lease holder fetches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Refresh whatever is due once and exit (e.g. from cron)')
+        parser.add_argument('--tick', type=float, default=None,
+                            help='Seconds between schedule checks. Defaults to NEWS_SCHEDULER_TICK')
+        parser.add_argument('--holder', default=None,
+                            help='Name this process uses for the leader lease. Defaults to host:pid')
+
+    def handle(self, *args, **options):
+        schedules = get_schedules()
+        unknown = sorted(set(schedules) - set(PROVIDERS))
+        if unknown:
+            raise CommandError(f"Unknown providers in the refresh schedule: {', '.join(unknown)}")
+
+        scheduler = RefreshScheduler(
+            schedules,
+            holder=options['holder'] or f"{socket.gethostname()}:{os.getpid()}",
+            lease_ttl=getattr(settings, 'NEWS_SCHEDULER_LEASE_TTL', 300),
+            stdout=self.stdout,
+        )
+        if options['once']:
+            scheduler.tick()
+            scheduler.release()
+            return
+
+        tick = options['tick'] or getattr(settings, 'NEWS_SCHEDULER_TICK', 15)
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stop.set())
+
+        schedule_text = ', '.join(f"{name} every {seconds}s" for name, seconds in schedules.items())
+        self.stdout.write(f"Scheduler started ({schedule_text})")
+        try:
+            while not stop.is_set():
+                scheduler.tick()
+                stop.wait(tick)
+        finally:
+            # Hand over right away instead of making standbys wait for the lease to expire
+            scheduler.release()
+        self.stdout.write(self.style.SUCCESS('Scheduler stopped'))
@@ -0,0 +1,46 @@
+import os
+import signal
+import socket
+import threading
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from newsapp.jobs import claim_next, fail_stale_jobs, run_job
+
+class Command(BaseCommand):
+    help = 'Runs background jobs (such as news refreshes) queued in the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll', type=float, default=None,
+                            help='Seconds between queue checks when idle. Defaults to NEWS_JOB_POLL_INTERVAL')
+
+    def handle(self, *args, **options):
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        poll = options['poll'] or getattr(settings, 'NEWS_JOB_POLL_INTERVAL', 2)
+        stale_timeout = getattr(settings, 'NEWS_JOB_TIMEOUT', 900)
+
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            # Finish the current job, then exit
+            signal.signal(signum, lambda *args: stop.set())
+
+        self.stdout.write(f"Worker {worker} started")
+        while not stop.is_set():
+            stale = fail_stale_jobs(stale_timeout)
+            if stale:
+                self.stdout.write(self.style.WARNING(f"Marked {stale} abandoned jobs as failed"))
+
+            job = claim_next(worker)
+            if job is None:
+                if options['burst']:
+                    break
+                stop.wait(poll)
+                continue
+
+            self.stdout.write(f"Running {job}...")
+            run_job(job)
+            if job.status == job.DONE:
+                self.stdout.write(self.style.SUCCESS(f"Finished {job}: {job.result}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"Failed {job}: {job.error}"))
+        self.stdout.write('Worker stopped')
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsapp', '0003_remove_userpreference_articles_per_page_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FetchCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=50)),
+                ('source_key', models.CharField(max_length=100)),
+                ('last_published_at', models.DateTimeField(blank=True, null=True)),
+                ('seen_urls', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('provider', 'source_key')},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsapp', '0004_fetchcursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleFingerprint',
+            fields=[
+                ('news', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fingerprint', serialize=False, to='newsapp.news')),
+                ('signature', models.BinaryField()),
+                ('published_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FingerprintBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField(db_index=True)),
+                ('fingerprint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='newsapp.articlefingerprint')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SyndicatedArticle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('url', models.URLField()),
+                ('published_at', models.DateTimeField()),
+                ('similarity', models.FloatField(help_text='Estimated Jaccard similarity to the stored article')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('news', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='syndicated_copies', to='newsapp.news')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='newsapp.source')),
+            ],
+        ),
+    ]
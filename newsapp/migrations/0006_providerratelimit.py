@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsapp', '0005_near_duplicate_detection'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProviderRateLimit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=50, unique=True)),
+                ('tokens', models.FloatField()),
+                ('refilled_at', models.FloatField()),
+                ('blocked_until', models.FloatField(default=0, help_text='No requests before this time (from Retry-After)')),
+            ],
+        ),
+    ]
@@ -0,0 +1,71 @@
+from django.db import migrations
+
+SQLITE_FORWARDS = [
+    # External-content FTS5 table: the text stays in newsapp_news, the index lives here
+    """CREATE VIRTUAL TABLE newsapp_news_fts USING fts5(
+        title, content, author,
+        content='newsapp_news', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )""",
+    # Title matches count most, then author, then body
+    "INSERT INTO newsapp_news_fts(newsapp_news_fts, rank) VALUES('rank', 'bm25(10.0, 1.0, 2.0)')",
+    """CREATE TRIGGER newsapp_news_fts_insert AFTER INSERT ON newsapp_news BEGIN
+        INSERT INTO newsapp_news_fts(rowid, title, content, author) VALUES (new.id, new.title, new.content, new.author);
+    END""",
+    """CREATE TRIGGER newsapp_news_fts_delete AFTER DELETE ON newsapp_news BEGIN
+        INSERT INTO newsapp_news_fts(newsapp_news_fts, rowid, title, content, author)
+        VALUES ('delete', old.id, old.title, old.content, old.author);
+    END""",
+    # Only text changes touch the index, not e.g. is_read updates
+    """CREATE TRIGGER newsapp_news_fts_update AFTER UPDATE OF title, content, author ON newsapp_news BEGIN
+        INSERT INTO newsapp_news_fts(newsapp_news_fts, rowid, title, content, author)
+        VALUES ('delete', old.id, old.title, old.content, old.author);
+        INSERT INTO newsapp_news_fts(rowid, title, content, author) VALUES (new.id, new.title, new.content, new.author);
+    END""",
+    "INSERT INTO newsapp_news_fts(newsapp_news_fts) VALUES('rebuild')",
+]
+
+SQLITE_BACKWARDS = [
+    "DROP TRIGGER IF EXISTS newsapp_news_fts_update",
+    "DROP TRIGGER IF EXISTS newsapp_news_fts_delete",
+    "DROP TRIGGER IF EXISTS newsapp_news_fts_insert",
+    "DROP TABLE IF EXISTS newsapp_news_fts",
+]
+
+POSTGRESQL_FORWARDS = [
+    # A generated column stays in sync with every insert and update by itself
+    """ALTER TABLE newsapp_news ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(author, '')), 'B') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(content, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX newsapp_news_search_vector ON newsapp_news USING GIN (search_vector)",
+]
+
+POSTGRESQL_BACKWARDS = [
+    "DROP INDEX IF EXISTS newsapp_news_search_vector",
+    "ALTER TABLE newsapp_news DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+# Full-text search index on News: FTS5 on SQLite, a tsvector column with a GIN
+# index on PostgreSQL. Other databases get no index; search falls back to icontains.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsapp', '0009_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({'sqlite': SQLITE_FORWARDS, 'postgresql': POSTGRESQL_FORWARDS}),
+            run_for_vendor({'sqlite': SQLITE_BACKWARDS, 'postgresql': POSTGRESQL_BACKWARDS}),
+        ),
+    ]
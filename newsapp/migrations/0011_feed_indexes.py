@@ -0,0 +1,89 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:32
+
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BACKFILL_CHUNK = 5000
+
+
+def url_key(url):
+    """newsapp.models.url_key as of this migration, copied so later changes to it don't alter the backfill"""
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not k.startswith('utm_'))
+    normalized = urlunsplit((
+        parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), urlencode(query), '',
+    ))
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def backfill_url_hashes(apps, schema_editor):
+    """Fill url_hash for stored articles; later rows repeating a URL keep NULL so the unique index can be built"""
+    News = apps.get_model('newsapp', 'News')
+    seen = set()
+    last_pk = 0
+    with schema_editor.connection.cursor() as cursor:
+        while True:
+            rows = list(News.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'url')[:BACKFILL_CHUNK])
+            if not rows:
+                break
+            updates = []
+            for pk, url in rows:
+                key = url_key(url)
+                if key is not None and key not in seen:
+                    seen.add(key)
+                    updates.append((key, pk))
+            cursor.executemany('UPDATE newsapp_news SET url_hash = %s WHERE id = %s', updates)
+            last_pk = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsapp', '0010_news_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='url_hash',
+            field=models.CharField(blank=True, editable=False, max_length=40, null=True),
+        ),
+        migrations.RunPython(backfill_url_hashes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='newscategory',
+            name='category',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='newsapp.category'),
+        ),
+        migrations.AlterField(
+            model_name='newscategory',
+            name='news',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='newsapp.news'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['-published_at', '-id'], name='news_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['source', '-published_at', '-id'], name='news_source_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['title'], name='news_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newscategory',
+            index=models.Index(fields=['category', 'news'], name='newscategory_category_news_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='news',
+            constraint=models.UniqueConstraint(condition=models.Q(('url_hash__isnull', False)), fields=('url_hash',), name='unique_news_url_hash'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:37
+
+from django.db import migrations, models
+
+MASK_BITS = 63
+
+
+def assign_bits_and_masks(apps, schema_editor):
+    """Give existing categories the lowest bits by id, then compute every article's mask in one UPDATE"""
+    Category = apps.get_model('newsapp', 'Category')
+    for bit, category in enumerate(Category.objects.filter(bit=None).order_by('id')[:MASK_BITS]):
+        category.bit = bit
+        category.save(update_fields=['bit'])
+    # Each (news, category) pair is unique, so summing the bits ORs them
+    schema_editor.execute(
+        "UPDATE newsapp_news SET category_mask = ("
+        "SELECT COALESCE(SUM(CAST(1 AS BIGINT) << c.bit), 0) "
+        "FROM newsapp_newscategory nc JOIN newsapp_category c ON c.id = nc.category_id "
+        "WHERE nc.news_id = newsapp_news.id AND c.bit IS NOT NULL)"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsapp', '0011_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='bit',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, unique=True),
+        ),
+        # A plain ADD COLUMN with a constant default: instant on PostgreSQL, and SQLite doesn't
+        # rebuild newsapp_news (which would drop the full-text search triggers)
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    'ALTER TABLE newsapp_news ADD COLUMN category_mask bigint NOT NULL DEFAULT 0',
+                    'ALTER TABLE newsapp_news DROP COLUMN category_mask',
+                ),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='news',
+                    name='category_mask',
+                    field=models.BigIntegerField(default=0, editable=False),
+                ),
+            ],
+        ),
+        migrations.RunPython(assign_bits_and_masks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:45
+
+from django.db import migrations, models
+
+
+def count_news(apps, schema_editor):
+    """Fill both counters with one aggregate UPDATE each"""
+    schema_editor.execute(
+        "UPDATE newsapp_category SET news_count = ("
+        "SELECT COUNT(*) FROM newsapp_newscategory nc WHERE nc.category_id = newsapp_category.id)"
+    )
+    schema_editor.execute(
+        "UPDATE newsapp_source SET news_count = ("
+        "SELECT COUNT(*) FROM newsapp_news n WHERE n.source_id = newsapp_source.id)"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsapp', '0012_category_mask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='news_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='source',
+            name='news_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_news, migrations.RunPython.noop),
+    ]
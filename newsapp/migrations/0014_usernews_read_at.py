@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsapp', '0013_news_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usernews',
+            name='read_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
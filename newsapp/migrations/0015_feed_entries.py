@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsapp', '0014_usernews_read_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userpreference',
+            name='feed_precomputed',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('published_at', models.DateTimeField()),
+                ('news', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='newsapp.news')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Feed entries',
+                'indexes': [models.Index(fields=['user', '-published_at', '-news'], name='feedentry_user_published_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'news'), name='unique_feed_entry')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsapp', '0015_feed_entries'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='articlefingerprint',
+            index=models.Index(fields=['published_at'], name='fingerprint_published_idx'),
+        ),
+    ]
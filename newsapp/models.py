@@ -1,17 +1,102 @@
-from django.db import models
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 
-class Category(models.Model):
+def url_key(url):
+    """Hash of a normalized article URL, or None for an empty one.
+
+    Scheme and host are lower-cased, the fragment, tracking parameters
+    (utm_*) and a trailing slash are dropped, and the remaining query
+    parameters are sorted, so the same article linked slightly
+    differently gets the same key.
+    """
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not k.startswith('utm_'))
+    normalized = urlunsplit((
+        parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), urlencode(query), '',
+    ))
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+class BatchedDeleteQuerySet(models.QuerySet):
+    def delete(self):
+        # Imported here because the signal handlers import these models
+        from .signals import deferred_category_updates
+        with transaction.atomic(), deferred_category_updates():
+            return super().delete()
+
+class BatchedDeletes(models.Model):
+    """Base for models whose deletes cascade to many articles or category links.
+
+    Deleting an instance or a queryset runs inside
+    deferred_category_updates, so the cascade refreshes category masks,
+    moves counters and invalidates cached pages once instead of once
+    per deleted row.
+    """
+    objects = BatchedDeleteQuerySet.as_manager()
+    
+    class Meta:
+        abstract = True
+    
+    def delete(self, *args, **kwargs):
+        from .signals import deferred_category_updates
+        with transaction.atomic(), deferred_category_updates():
+            return super().delete(*args, **kwargs)
+
+class NewsCounted(models.Model):
+    """Base for models that keep the number of their articles in ``news_count``.
+
+    The count is changed only with relative UPDATEs (newsapp.counters),
+    so saving an existing instance leaves the column alone instead of
+    writing back a value that may be stale by then.
+    """
+    news_count = models.IntegerField(default=0, editable=False)
+    
+    class Meta:
+        abstract = True
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'news_count'
+            ]
+        super().save(*args, **kwargs)
+
+class Category(NewsCounted, BatchedDeletes):
+    # Bits available in News.category_mask (a signed 64-bit integer)
+    MASK_BITS = 63
+    
     name = models.CharField(max_length=100, unique=True)
+    # This category's bit in News.category_mask; None once all MASK_BITS are taken
+    bit = models.PositiveSmallIntegerField(unique=True, null=True, blank=True, editable=False)
     
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        if self.bit is None and self.pk is None:
+            self.bit = next(iter(Category.free_bits()), None)
+        super().save(*args, **kwargs)
+    
+    @property
+    def mask(self):
+        return 1 << self.bit if self.bit is not None else 0
+    
+    @staticmethod
+    def free_bits():
+        """Unassigned mask bits, lowest first"""
+        used = set(Category.objects.exclude(bit=None).values_list('bit', flat=True))
+        return [bit for bit in range(Category.MASK_BITS) if bit not in used]
+    
     class Meta:
         verbose_name_plural = "Categories"
 
-class Source(models.Model):
+class Source(NewsCounted, BatchedDeletes):
     name = models.CharField(max_length=100)
     website_url = models.URLField()
     country = models.CharField(max_length=100)
@@ -19,7 +104,7 @@ class Source(models.Model):
     def __str__(self):
         return self.name
 
-class News(models.Model):
+class News(BatchedDeletes):
     title = models.CharField(max_length=255)
     content = models.TextField()
     author = models.CharField(max_length=100, blank=True, null=True)
@@ -28,28 +113,69 @@ class News(models.Model):
     source = models.ForeignKey(Source, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Unused: reads are tracked per user in UserNews
     is_read = models.BooleanField(default=False)
     url = models.URLField()
+    # url_key(url), so stored articles can be matched by URL through a short unique index
+    url_hash = models.CharField(max_length=40, null=True, blank=True, editable=False)
+    # OR of Category.mask over the article's categories, kept in sync with NewsCategory;
+    # lets the feed filter by category and show badges without joining NewsCategory
+    category_mask = models.BigIntegerField(default=0, editable=False)
     categories = models.ManyToManyField(Category, through='NewsCategory')
     users = models.ManyToManyField(User, through='UserNews')
     
     def __str__(self):
         return self.title
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        news = super().from_db(db, field_names, values)
+        news._loaded_url = news.__dict__.get('url')
+        return news
+    
+    def save(self, *args, **kwargs):
+        # Only for a new or changed URL: rows repeating an earlier article's URL keep the NULL
+        # url_hash migration 0011 gave them, which a recomputed key would collide with
+        if self._state.adding or ('url' in self.__dict__ and self.url != getattr(self, '_loaded_url', None)):
+            self.url_hash = url_key(self.url)
+        super().save(*args, **kwargs)
+        self._loaded_url = self.url
+    
     class Meta:
         verbose_name_plural = "News"
+        indexes = [
+            # Feed order and the keyset pagination on it
+            models.Index(fields=['-published_at', '-id'], name='news_published_idx'),
+            # Source filter in feed order
+            models.Index(fields=['source', '-published_at', '-id'], name='news_source_published_idx'),
+            # Deduplication by title on ingest
+            models.Index(fields=['title'], name='news_title_idx'),
+        ]
+        constraints = [
+            # Partial, so articles without a URL (and old rows sharing one) can keep a NULL key
+            models.UniqueConstraint(
+                fields=['url_hash'], condition=models.Q(url_hash__isnull=False), name='unique_news_url_hash',
+            ),
+        ]
 
 class NewsCategory(models.Model):
-    news = models.ForeignKey(News, on_delete=models.CASCADE)
-    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    # Both columns are covered by the unique (news, category) and the (category, news) index
+    news = models.ForeignKey(News, on_delete=models.CASCADE, db_index=False)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, db_index=False)
     
     class Meta:
         unique_together = ('news', 'category')
+        indexes = [
+            # Category filter: finds the category's articles without touching the link table's rows
+            models.Index(fields=['category', 'news'], name='newscategory_category_news_idx'),
+        ]
         verbose_name_plural = "News Categories"
 
 class UserNews(models.Model):
+    """An article a user has read, written in batches by newsapp.reads"""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     news = models.ForeignKey(News, on_delete=models.CASCADE)
+    read_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         unique_together = ('user', 'news')
@@ -80,6 +206,224 @@ class UserPreference(models.Model):
     preferred_sources = models.ManyToManyField(Source, blank=True)
     preferred_categories = models.ManyToManyField(Category, blank=True)
     dark_mode = models.BooleanField(default=False)
+    # Whether "My feed" is kept in FeedEntry; otherwise it is queried from News (see newsapp.feeds)
+    feed_precomputed = models.BooleanField(default=False, editable=False)
     
     def __str__(self):
         return f"Preferences for {self.user.username}"
+
+class FeedEntry(models.Model):
+    """An article in a user's precomputed "My feed", written when the article is ingested"""
+    # Covered by the (user, published_at, news) index
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    news = models.ForeignKey(News, on_delete=models.CASCADE, related_name='feed_entries')
+    # Copy of news.published_at, so a page is one range of the user's index
+    published_at = models.DateTimeField()
+    
+    class Meta:
+        verbose_name_plural = "Feed entries"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'news'], name='unique_feed_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-published_at', '-news'], name='feedentry_user_published_idx'),
+        ]
+    
+    def __str__(self):
+        return f"News {self.news_id} in the feed of user {self.user_id}"
+
+class FetchCursor(models.Model):
+    """Where the last fetch of a provider/source left off.
+
+    Keeps the newest publication time seen plus the URLs of the most
+    recent articles, so a fetch can skip everything it already ingested.
+    """
+    SEEN_URLS_LIMIT = 200
+
+    provider = models.CharField(max_length=50)
+    source_key = models.CharField(max_length=100)
+    last_published_at = models.DateTimeField(blank=True, null=True)
+    seen_urls = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('provider', 'source_key')
+    
+    def __str__(self):
+        return f"{self.provider}:{self.source_key} at {self.last_published_at}"
+    
+    def take_unseen(self, articles):
+        """Return the leading unseen articles of a newest-first list.
+
+        Stops at the first article that is older than the cursor or whose
+        URL was already seen; everything after it is older still.
+        """
+        seen = set(self.seen_urls)
+        unseen = []
+        for article in articles:
+            if article.url in seen:
+                break
+            if self.last_published_at and article.published_at < self.last_published_at:
+                break
+            unseen.append(article)
+        return unseen
+    
+    def advance(self, articles):
+        """Move the cursor past the given articles; return True if it changed"""
+        if not articles:
+            return False
+        newest = max(article.published_at for article in articles)
+        if self.last_published_at is None or newest > self.last_published_at:
+            self.last_published_at = newest
+        urls = [article.url for article in articles if article.url]
+        self.seen_urls = (urls + [url for url in self.seen_urls if url not in urls])[:self.SEEN_URLS_LIMIT]
+        return True
+    
+    @classmethod
+    def advance_stored(cls, provider, source_key, articles):
+        """Move the stored cursor past the given articles, creating it if needed; return it.
+
+        The scheduler and a worker may fetch the same source at once, so
+        the row is locked and advanced from what is stored now rather
+        than saved from a copy loaded earlier: the other fetch's row
+        (or its progress) is merged into instead of tripping the unique
+        constraint or being overwritten.
+        """
+        with transaction.atomic():
+            # get_or_create falls back to reading the row if a concurrent create wins
+            cursor, _ = cls.objects.select_for_update().get_or_create(provider=provider, source_key=source_key)
+            if cursor.advance(articles):
+                cursor.save()
+        return cursor
+
+class ArticleFingerprint(models.Model):
+    """MinHash signature of a stored article, used for near-duplicate detection"""
+    news = models.OneToOneField(News, on_delete=models.CASCADE, primary_key=True, related_name='fingerprint')
+    signature = models.BinaryField()
+    published_at = models.DateTimeField()
+    
+    class Meta:
+        indexes = [
+            # Pruning fingerprints that have aged out of the dedup window
+            models.Index(fields=['published_at'], name='fingerprint_published_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Fingerprint of news {self.news_id}"
+
+class FingerprintBand(models.Model):
+    """One LSH bucket of an article's MinHash signature.
+
+    Similar articles land in the same bucket for at least one band with
+    high probability, so candidates are found with one indexed IN lookup.
+    """
+    bucket = models.BigIntegerField(db_index=True)
+    fingerprint = models.ForeignKey(ArticleFingerprint, on_delete=models.CASCADE, related_name='bands')
+    
+    def __str__(self):
+        return f"Bucket {self.bucket} of news {self.fingerprint_id}"
+
+class SyndicatedArticle(models.Model):
+    """A near-duplicate of a stored article, e.g. the same wire story from another outlet"""
+    news = models.ForeignKey(News, on_delete=models.CASCADE, related_name='syndicated_copies')
+    source = models.ForeignKey(Source, on_delete=models.CASCADE)
+    title = models.CharField(max_length=255)
+    url = models.URLField()
+    published_at = models.DateTimeField()
+    similarity = models.FloatField(help_text='Estimated Jaccard similarity to the stored article')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.source} copy of {self.news_id}"
+
+class ProviderRateLimit(models.Model):
+    """Shared token bucket for one provider's upstream requests.
+
+    Lives in the database so every process fetching news draws from the
+    same budget. Times are epoch seconds so the row can be updated with
+    an exact compare-and-swap.
+    """
+    provider = models.CharField(max_length=50, unique=True)
+    tokens = models.FloatField()
+    refilled_at = models.FloatField()
+    blocked_until = models.FloatField(default=0, help_text='No requests before this time (from Retry-After)')
+    
+    def __str__(self):
+        return f"{self.provider}: {self.tokens:.1f} tokens"
+
+class BackfillCheckpoint(models.Model):
+    """Progress of a resumable backfill that walks a table in primary key order"""
+    name = models.CharField(max_length=50, unique=True)
+    # What the backfill computes against, e.g. the categorizer version; a change restarts it
+    version = models.CharField(max_length=64, blank=True)
+    last_pk = models.BigIntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} at pk {self.last_pk}{' (completed)' if self.completed else ''}"
+
+class LeaderLease(models.Model):
+    """Time-limited lease naming the one process allowed to run a cluster-wide job"""
+    name = models.CharField(max_length=50, unique=True)
+    holder = models.CharField(max_length=255)
+    expires_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.name} held by {self.holder} until {self.expires_at}"
+
+class RefreshSchedule(models.Model):
+    """When the scheduler last refreshed a provider and when it is due next"""
+    provider = models.CharField(max_length=50, unique=True)
+    last_run_at = models.DateTimeField(blank=True, null=True)
+    next_run_at = models.DateTimeField(blank=True, null=True)
+    last_duration = models.FloatField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    
+    def __str__(self):
+        return f"{self.provider} next at {self.next_run_at}"
+
+class Job(models.Model):
+    """A unit of background work, queued in the database and run by ``manage.py run_worker``"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    IN_FLIGHT = (QUEUED, RUNNING)
+    
+    kind = models.CharField(max_length=50)
+    # Jobs with the same key do the same work, so only one may be in flight at a time
+    key = models.CharField(max_length=255)
+    arguments = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.FloatField(default=0, help_text='Fraction of the work done, from 0 to 1')
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    # Bumped by the running worker every third of NEWS_JOB_TIMEOUT; a job that stops updating has lost its worker
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['key'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='unique_in_flight_job',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
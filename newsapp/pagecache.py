@@ -0,0 +1,147 @@
+import hashlib
+import logging
+import time
+import uuid
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger(__name__)
+
+CONTENT_VERSION_KEY = 'newsapp:content-version'
+
+
+def get_cache():
+    return caches[getattr(settings, 'NEWS_PAGE_CACHE', 'default')]
+
+
+def cache_is_shared():
+    """Whether other processes see this cache; a per-process one can't learn of their changes"""
+    return not isinstance(get_cache(), LocMemCache)
+
+
+def cache_version(key):
+    """Current value of a version kept in the cache, starting one if it's missing.
+
+    The cache has to be shared by every process (see CACHES): versions
+    are moved by whichever process changes the data, often the
+    scheduler or a worker rather than the web server.
+    """
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        version = new_version()
+        if not cache.add(key, version, None):
+            # Another process started it first
+            version = cache.get(key, version)
+    return version
+
+
+def bump_cache_version(key):
+    """Move a version on, orphaning everything cached under the old value.
+
+    A fresh unique value rather than incr(): file and database caches
+    implement incr() as a get and a set, which can lose a concurrent
+    bump or bring back an older value, and a unique one can't. It also
+    can't repeat a version from before the key was evicted.
+    """
+    get_cache().set(key, new_version(), None)
+
+
+def new_version():
+    return uuid.uuid4().hex[:16]
+
+
+def content_version():
+    """Current version of the news content; cached pages of older versions are never served"""
+    return cache_version(CONTENT_VERSION_KEY)
+
+
+def bump_content_version():
+    """Invalidate every cached page by moving to a new content version"""
+    bump_cache_version(CONTENT_VERSION_KEY)
+
+
+def page_cache_key(request, version):
+    """Cache key for a page: its path plus the query parameters, sorted, with empty values dropped"""
+    params = sorted(
+        (key, value)
+        for key in request.GET
+        for value in set(request.GET.getlist(key))
+        if value != ''
+    )
+    query = hashlib.sha1(urlencode(params).encode()).hexdigest()
+    return f'newsapp:page:{version}:{request.path}:{query}'
+
+
+def cache_anonymous_page(params=()):
+    """Serve a view's pages to anonymous visitors from the cache.
+
+    Pages are stored per path and sorted query parameters under the
+    current content version, so bumping it (ingest does, and so do
+    edits in the admin) replaces them all at once without a TTL.
+    Requests with parameters outside ``params`` are not cached, and
+    neither are those with pending flash messages, and nothing is
+    cached when the cache isn't shared by all processes. When a page is
+    missing, one request renders it while concurrent ones for the
+    same page wait up to NEWS_PAGE_CACHE_LOCK_TIMEOUT seconds for
+    the result instead of all running the same queries.
+    """
+    allowed = set(params)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+                or not set(request.GET) <= allowed
+                or len(get_messages(request))
+                or not cache_is_shared()
+            ):
+                return view(request, *args, **kwargs)
+
+            cache = get_cache()
+            key = page_cache_key(request, content_version())
+            response = cache.get(key)
+            if response is not None:
+                response['X-Page-Cache'] = 'hit'
+                return response
+
+            lock_timeout = getattr(settings, 'NEWS_PAGE_CACHE_LOCK_TIMEOUT', 10)
+            if not cache.add(f'{key}:lock', 1, lock_timeout):
+                response = wait_for_page(cache, key, lock_timeout)
+                if response is not None:
+                    response['X-Page-Cache'] = 'hit'
+                    return response
+                logger.warning(f"Timed out waiting for {request.path} to be rendered; rendering it again")
+
+            try:
+                response = view(request, *args, **kwargs)
+                # Pages that set cookies (e.g. a CSRF token) belong to one visitor
+                if response.status_code == 200 and not response.streaming and not response.cookies:
+                    cache.set(key, response, getattr(settings, 'NEWS_PAGE_CACHE_TIMEOUT', 3600))
+            finally:
+                cache.delete(f'{key}:lock')
+            response['X-Page-Cache'] = 'miss'
+            return response
+        return wrapper
+    return decorator
+
+
+def wait_for_page(cache, key, timeout, interval=0.05):
+    """Poll for a page another request is rendering; None if it doesn't show up in time"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(interval)
+        response = cache.get(key)
+        if response is not None:
+            return response
+        if cache.get(f'{key}:lock') is None:
+            # The renderer gave up (error or uncacheable response) without storing a page
+            return None
+    return None
@@ -0,0 +1,138 @@
+import base64
+import binascii
+import hashlib
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+
+def encode_cursor(direction, published_at, pk):
+    """Opaque token for the page after ('next') or before ('prev') the article at (published_at, pk)"""
+    payload = json.dumps([direction, published_at.isoformat(), pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """(direction, published_at, pk) from a cursor token, or None if it isn't a valid one"""
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        direction, published_at, pk = json.loads(payload)
+        if direction not in ('next', 'prev'):
+            return None
+        return direction, datetime.fromisoformat(published_at), int(pk)
+    except (ValueError, TypeError, binascii.Error):
+        return None
+
+
+class CursorPaginator:
+    """Keyset pagination over News, newest first.
+
+    Pages are ordered by (published_at, id) and each one starts where the
+    previous one ended, using a WHERE on those two columns instead of
+    OFFSET. With the index on those columns (news_published_idx) a deep
+    page costs the same as the first. Links carry an opaque cursor token
+    rather than a page number. The total count is only worked out when
+    something asks for it, and it is cached for NEWS_FEED_COUNT_TTL
+    seconds per filter combination, so it can lag slightly behind.
+
+    ``tiebreaker`` names the column that orders rows with the same
+    published_at, for querysets of other models that carry a copy of
+    it (FeedEntry pages by published_at and news_id). Page items must
+    then be mapped to the articles, whose pk is that column's value.
+    Querysets of ``.values()`` page the same way; their rows need
+    ``published_at`` and ``id``.
+    """
+
+    def __init__(self, queryset, per_page, tiebreaker='id'):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.tiebreaker = tiebreaker
+
+    def page(self, token):
+        """The page for a cursor token; the first page for a missing or invalid one"""
+        cursor = decode_cursor(token) if token else None
+        if cursor is None:
+            return self._first_page()
+
+        direction, published_at, pk = cursor
+        rows = list(self.keyset(direction, published_at, pk)[:self.per_page + 1])
+        if direction == 'next':
+            return CursorPage(rows[:self.per_page], self, has_previous=True, has_next=len(rows) > self.per_page)
+        if len(rows) <= self.per_page:
+            # Reached the top of the feed, which may have grown since; start over from the newest
+            return self._first_page()
+        # Rows were read backwards from the cursor; put the page back in feed order
+        return CursorPage(rows[:self.per_page][::-1], self, has_previous=True, has_next=True)
+
+    def keyset(self, direction, published_at, pk):
+        """Articles after ('next') or before ('prev') the one at (published_at, pk), nearest first"""
+        # The plain bound on published_at lets the database range-scan an index on (published_at, id)
+        if direction == 'next':
+            return (
+                self.queryset.filter(published_at__lte=published_at)
+                .filter(Q(published_at__lt=published_at) | Q(**{f'{self.tiebreaker}__lt': pk}))
+                .order_by('-published_at', f'-{self.tiebreaker}')
+            )
+        return (
+            self.queryset.filter(published_at__gte=published_at)
+            .filter(Q(published_at__gt=published_at) | Q(**{f'{self.tiebreaker}__gt': pk}))
+            .order_by('published_at', self.tiebreaker)
+        )
+
+    def _first_page(self):
+        rows = list(self.queryset.order_by('-published_at', f'-{self.tiebreaker}')[:self.per_page + 1])
+        return CursorPage(rows[:self.per_page], self, has_previous=False, has_next=len(rows) > self.per_page)
+
+    @property
+    def count(self):
+        """Number of articles matching the queryset, cached per distinct query"""
+        query_hash = hashlib.sha1(str(self.queryset.order_by().query).encode()).hexdigest()
+        timeout = getattr(settings, 'NEWS_FEED_COUNT_TTL', 300)
+        return cache.get_or_set(f'newsapp:feed-count:{query_hash}', self.queryset.count, timeout)
+
+
+class CursorPage:
+    """One page of a CursorPaginator, with tokens for the pages around it"""
+
+    def __init__(self, object_list, paginator, has_previous, has_next):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_previous = has_previous and bool(object_list)
+        self._has_next = has_next and bool(object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_other_pages(self):
+        return self._has_previous or self._has_next
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous:
+            return encode_cursor('prev', *position(self.object_list[0]))
+        return None
+
+    @property
+    def next_cursor(self):
+        if self._has_next:
+            return encode_cursor('next', *position(self.object_list[-1]))
+        return None
+
+
+def position(row):
+    """(published_at, pk) of a page item: a model instance or a row of ``.values()``"""
+    if isinstance(row, dict):
+        return row['published_at'], row['id']
+    return row.published_at, row.pk
@@ -0,0 +1,546 @@
+import json
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from xml.etree import ElementTree
+
+import pytz
+from django.conf import settings
+from django.utils import timezone
+
+from .categorizer import CATEGORY_KEYWORDS, UNCATEGORIZED, get_categorizer
+from .fetcher import FetchRequest
+from .ingest import NormalizedArticle, clean_content, parse_published_at
+from .mock_data import NEWSAPI_MOCK_ARTICLES, GNEWS_MOCK_ARTICLES
+
+logger = logging.getLogger(__name__)
+
+# Registered provider classes by name
+PROVIDERS = {}
+
+# NewsAPI sources to fetch, created in the database if they don't exist
+NEWSAPI_SOURCES = {
+    "bbc-news": {
+        "name": "BBC News",
+        "website_url": "https://www.bbc.co.uk/news",
+        "country": "United Kingdom"
+    },
+    "cnn": {
+        "name": "CNN",
+        "website_url": "https://www.cnn.com",
+        "country": "United States"
+    },
+    "the-washington-post": {
+        "name": "The Washington Post",
+        "website_url": "https://www.washingtonpost.com",
+        "country": "United States"
+    },
+    "reuters": {
+        "name": "Reuters",
+        "website_url": "https://www.reuters.com",
+        "country": "International"
+    },
+    "associated-press": {
+        "name": "Associated Press",
+        "website_url": "https://apnews.com",
+        "country": "United States"
+    }
+}
+
+
+class ProviderError(Exception):
+    """Raised when a provider can't be set up or returns an unusable response"""
+
+
+def register_provider(cls):
+    """Class decorator adding a provider to the registry under its name"""
+    PROVIDERS[cls.name] = cls
+    return cls
+
+
+def get_provider(name, **options):
+    """Instantiate a registered provider by name"""
+    try:
+        provider_class = PROVIDERS[name]
+    except KeyError:
+        raise ProviderError(f"Unknown news provider '{name}'. Available: {', '.join(sorted(PROVIDERS))}")
+    return provider_class(**options)
+
+
+class BaseProvider:
+    """A source of articles.
+
+    Providers describe the HTTP requests they need (``build_requests``) and
+    turn the fetched results into a stream of ``(source_key, articles)``
+    pairs (``responses``), where ``articles`` is an iterator of
+    NormalizedArticle. Nothing is accumulated, so articles flow straight
+    into the batched writer. Providers that read local files or generate
+    data ignore the results and produce their stream directly.
+    """
+
+    name = None
+    label = None
+    # Whether FetchCursor bookkeeping applies to this provider's responses
+    uses_cursors = True
+    # Name of the provider to use instead when running with --mock
+    mock_variant = None
+
+    def __init__(self, limit=10, **options):
+        self.limit = limit
+        self.options = options
+        self.warnings = []
+
+    def is_configured(self):
+        """Whether the provider has everything it needs (API keys, files) to run"""
+        return True
+
+    def build_requests(self, cursors):
+        """Return the FetchRequests this provider needs; cursors maps source_key to FetchCursor"""
+        return []
+
+    def responses(self, results):
+        """Yield (source_key, articles) for every usable fetch result"""
+        for result in results:
+            source_key = result.request.key
+            if result.not_modified:
+                # Same payload as last time: nothing to parse or store
+                logger.info(f"{self.name}:{source_key} unchanged since last fetch")
+                continue
+            if not result.ok:
+                self.warn(f"Request failed for {self.label} {source_key}: {result.error}")
+                continue
+            try:
+                raw_articles = self.extract_articles(result.data)
+            except ProviderError as e:
+                self.warn(str(e))
+                continue
+            yield source_key, self.normalize_all(raw_articles)
+
+    def extract_articles(self, data):
+        """Pull the list of raw articles out of a decoded response"""
+        return data.get("articles", [])
+
+    def normalize_all(self, raw_articles):
+        for raw_article in raw_articles:
+            article = self.normalize(raw_article)
+            if article is not None:
+                yield article
+
+    def normalize(self, raw_article):
+        """Convert one raw article to a NormalizedArticle, or None to skip it"""
+        raise NotImplementedError
+
+    def warn(self, message):
+        logger.warning(message)
+        self.warnings.append(message)
+
+
+@register_provider
+class NewsAPIProvider(BaseProvider):
+    """Top headlines from newsapi.org, one request per configured source"""
+
+    name = 'newsapi'
+    label = 'NewsAPI'
+    mock_variant = 'newsapi-mock'
+
+    def is_configured(self):
+        return bool(settings.NEWS_API_KEY)
+
+    def build_requests(self, cursors):
+        # top-headlines has no date filter, so cursors only apply locally
+        api_endpoint = getattr(settings, 'NEWS_API_ENDPOINT', 'https://newsapi.org/v2/top-headlines')
+        return [
+            FetchRequest(self.name, source_id, api_endpoint, params={
+                "apiKey": settings.NEWS_API_KEY,
+                "sources": source_id,
+                "pageSize": self.limit
+            })
+            for source_id in NEWSAPI_SOURCES
+        ]
+
+    def extract_articles(self, data):
+        if data.get("status") != "ok":
+            raise ProviderError(f"NewsAPI returned error: {data.get('message', 'Unknown error')}")
+        return data.get("articles", [])
+
+    def normalize(self, article):
+        # Skip articles without title or content
+        if not article.get("title") or not (article.get("content") or article.get("description")):
+            return None
+
+        source_id = (article.get("source") or {}).get("id") or "unknown"
+        source_name = (article.get("source") or {}).get("name") or "Unknown Source"
+        source_data = NEWSAPI_SOURCES.get(source_id, {
+            "name": source_name,
+            "website_url": f"https://{source_name.lower().replace(' ', '')}.com",
+            "country": "Unknown"
+        })
+
+        return NormalizedArticle(
+            title=article["title"],
+            content=clean_content(article.get("content") or article.get("description", "No content available")),
+            author=article.get("author", "Unknown"),
+            image_url=article.get("urlToImage", ""),
+            published_at=parse_published_at(article.get("publishedAt")),
+            url=article.get("url", ""),
+            source_name=source_data["name"],
+            source_website_url=source_data["website_url"],
+            source_country=source_data["country"],
+        )
+
+
+@register_provider
+class GNewsProvider(BaseProvider):
+    """Top headlines from gnews.io, restricted to articles newer than the cursor"""
+
+    name = 'gnews'
+    label = 'GNews'
+    mock_variant = 'gnews-mock'
+
+    def is_configured(self):
+        return bool(settings.GNEWS_API_KEY)
+
+    def build_requests(self, cursors):
+        api_endpoint = getattr(settings, 'GNEWS_API_ENDPOINT', 'https://gnews.io/api/v4/top-headlines')
+        params = {
+            "token": settings.GNEWS_API_KEY,
+            "lang": "en",
+            "max": self.limit
+        }
+        cursor = cursors.get('top-headlines')
+        if cursor and cursor.last_published_at:
+            params["from"] = cursor.last_published_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+        return [FetchRequest(self.name, 'top-headlines', api_endpoint, params=params)]
+
+    def normalize(self, article):
+        # Skip articles without title or content
+        if not article.get("title") or not (article.get("content") or article.get("description")):
+            return None
+
+        source_data = article.get("source") or {}
+        source_name = source_data.get("name", "Unknown Source")
+
+        return NormalizedArticle(
+            title=article["title"],
+            content=clean_content(article.get("content") or article.get("description", "No content available")),
+            author="GNews",  # GNews API doesn't provide author
+            image_url=article.get("image", ""),
+            published_at=parse_published_at(article.get("publishedAt")),
+            url=article.get("url", ""),
+            source_name=source_name,
+            source_website_url=source_data.get("url", f"https://{source_name.lower().replace(' ', '')}.com"),
+            source_country="Unknown",  # GNews doesn't provide country info
+        )
+
+
+@register_provider
+class MockNewsAPIProvider(NewsAPIProvider):
+    """Canned NewsAPI articles for development, grouped by source like real responses"""
+
+    name = 'newsapi-mock'
+    label = 'NewsAPI'
+    mock_variant = None
+
+    def is_configured(self):
+        return True
+
+    def build_requests(self, cursors):
+        return []
+
+    def responses(self, results):
+        by_source = {}
+        for article in NEWSAPI_MOCK_ARTICLES:
+            by_source.setdefault((article.get("source") or {}).get("id") or "unknown", []).append(article)
+        for source_key, articles in by_source.items():
+            yield source_key, self.normalize_all(articles)
+
+
+@register_provider
+class MockGNewsProvider(GNewsProvider):
+    """Canned GNews articles for development"""
+
+    name = 'gnews-mock'
+    label = 'GNews'
+    mock_variant = None
+
+    def is_configured(self):
+        return True
+
+    def build_requests(self, cursors):
+        return []
+
+    def responses(self, results):
+        yield 'top-headlines', self.normalize_all(GNEWS_MOCK_ARTICLES)
+
+
+class FileProvider(BaseProvider):
+    """Base for providers reading a local dump given with --path"""
+
+    uses_cursors = False
+
+    def __init__(self, path=None, **options):
+        super().__init__(**options)
+        self.path = path
+
+    def is_configured(self):
+        return bool(self.path)
+
+    def responses(self, results):
+        if not self.path:
+            raise ProviderError(f"The {self.name} provider needs --path")
+        yield self.path, self.normalize_all(self.read())
+
+    def read(self):
+        """Yield raw records from the file one at a time"""
+        raise NotImplementedError
+
+
+@register_provider
+class NDJSONProvider(FileProvider):
+    """Newline-delimited JSON dump with one NewsAPI- or GNews-shaped article per line"""
+
+    name = 'ndjson'
+    label = 'NDJSON'
+
+    def read(self):
+        with open(self.path, encoding='utf-8') as dump:
+            for line_number, line in enumerate(dump, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    self.warn(f"{self.path}:{line_number}: invalid JSON ({str(e)})")
+
+    def normalize(self, article):
+        # GNews records carry "image" and no source id; everything else is read as NewsAPI
+        if "image" in article and "urlToImage" not in article:
+            return GNewsProvider.normalize(self, article)
+        return NewsAPIProvider.normalize(self, article)
+
+
+def parse_feed_date(value):
+    """Parse an RFC 822 (RSS) or ISO 8601 (Atom) date"""
+    if not value:
+        return timezone.now()
+    value = value.strip()
+    try:
+        published_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            published_at = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return timezone.now()
+    if timezone.is_naive(published_at):
+        published_at = published_at.replace(tzinfo=pytz.UTC)
+    return published_at
+
+
+@register_provider
+class FeedProvider(FileProvider):
+    """RSS 2.0 or Atom feed file, parsed incrementally with iterparse"""
+
+    name = 'rss'
+    label = 'RSS/Atom'
+
+    ATOM = '{http://www.w3.org/2005/Atom}'
+
+    def read(self):
+        feed_title = self.options.get('source_name')
+        in_entry = False
+        for event, element in ElementTree.iterparse(self.path, events=('start', 'end')):
+            tag = element.tag.replace(self.ATOM, '')
+            if event == 'start':
+                if tag in ('item', 'entry'):
+                    in_entry = True
+                continue
+            if tag == 'title' and not in_entry and feed_title is None:
+                feed_title = (element.text or '').strip()
+            elif tag in ('item', 'entry'):
+                in_entry = False
+                yield self._entry(element, feed_title or 'Unknown Source')
+                # Drop the parsed entry so memory stays flat for large feeds
+                element.clear()
+
+    def _entry(self, element, feed_title):
+        def text(*names):
+            for name in names:
+                child = element.find(name)
+                if child is None:
+                    child = element.find(self.ATOM + name)
+                if child is not None and (child.text or '').strip():
+                    return child.text.strip()
+            return None
+
+        link = text('link')
+        if link is None:
+            atom_link = element.find(self.ATOM + 'link')
+            if atom_link is not None:
+                link = atom_link.get('href')
+        return {
+            "title": text('title'),
+            "content": text('description', 'summary', 'content'),
+            "author": text('author', 'creator'),
+            "url": link or '',
+            "published": text('pubDate', 'published', 'updated'),
+            "source": feed_title,
+        }
+
+    def normalize(self, entry):
+        if not entry["title"] or not entry["content"]:
+            return None
+        return NormalizedArticle(
+            title=entry["title"][:255],
+            content=clean_content(entry["content"]),
+            author=(entry["author"] or '')[:100] or None,
+            published_at=parse_feed_date(entry["published"]),
+            url=entry["url"],
+            source_name=entry["source"],
+        )
+
+
+def parse_distribution(value):
+    """Parse "Politics=3,Sports=1" into category weights; Uncategorized is allowed too"""
+    weights = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in CATEGORY_KEYWORDS and name != UNCATEGORIZED:
+            raise ProviderError(f"Unknown category '{name}' in distribution")
+        try:
+            weights[name] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ProviderError(f"Invalid weight '{weight}' for category '{name}'")
+    return weights
+
+
+@register_provider
+class SyntheticProvider(BaseProvider):
+    """Generated NewsAPI- and GNews-shaped articles for load testing.
+
+    Produces ``count`` articles (``limit`` when not given), optionally
+    paced to ``rate`` articles per second. ``duplicate_ratio`` of them are
+    exact re-sends of a recent article, ``syndicated_ratio`` are lightly
+    reworded copies of one from another source. Each original story
+    carries keywords of one category drawn from ``categories`` (weights by
+    name, uniform by default). Text is made of pseudo-words, so unrelated
+    stories share no vocabulary. Pass ``seed`` for a reproducible stream.
+    """
+
+    name = 'synthetic'
+    label = 'Synthetic'
+    uses_cursors = False
+
+    SOURCE_COUNT = 50
+    # How many recent stories duplicates are drawn from
+    RECENT_STORIES = 1000
+    SYLLABLES = ['ba', 'ce', 'di', 'fo', 'gu', 'ka', 'le', 'mi', 'no', 'pu',
+                 'ra', 'se', 'ti', 'vo', 'zu', 'la', 'me', 'ni', 'po', 'tu']
+
+    def __init__(self, count=None, rate=0, duplicate_ratio=0.0, syndicated_ratio=0.0,
+                 categories=None, seed=None, **options):
+        super().__init__(**options)
+        self.count = count if count is not None else self.limit
+        self.rate = rate
+        self.duplicate_ratio = duplicate_ratio
+        self.syndicated_ratio = syndicated_ratio
+        if isinstance(categories, str):
+            categories = parse_distribution(categories)
+        categories = categories or dict.fromkeys(CATEGORY_KEYWORDS, 1.0)
+        self.category_names = list(categories)
+        self.category_weights = list(categories.values())
+        self.rng = random.Random(seed)
+        # Distinguishes the URLs of separate unseeded runs
+        self.run_id = f"{self.rng.getrandbits(32):08x}"
+
+        keywords = get_categorizer().vocabulary_keys
+        self.words = [
+            word for word in (a + b + c for a in self.SYLLABLES for b in self.SYLLABLES for c in [''] + self.SYLLABLES)
+            if word not in keywords
+        ]
+
+    def responses(self, results):
+        yield self.run_id, self.normalize_all(self.generate())
+
+    def generate(self):
+        """Yield raw article dicts, sleeping as needed to keep to the configured rate"""
+        rng = self.rng
+        recent = deque(maxlen=self.RECENT_STORIES)
+        started = time.monotonic()
+        for index in range(self.count):
+            if self.rate:
+                delay = started + index / self.rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            roll = rng.random()
+            if recent and roll < self.duplicate_ratio:
+                yield rng.choice(recent)
+                continue
+            if recent and roll < self.duplicate_ratio + self.syndicated_ratio:
+                article = self._syndicate(rng.choice(recent), index)
+            else:
+                article = self._story(index)
+            recent.append(article)
+            yield article
+
+    def _story(self, index):
+        rng = self.rng
+        category = rng.choices(self.category_names, self.category_weights)[0]
+        keywords = rng.sample(CATEGORY_KEYWORDS[category], 2) if category in CATEGORY_KEYWORDS else []
+        title = rng.choices(self.words, k=7) + keywords[:1]
+        content = rng.choices(self.words, k=rng.randint(50, 90))
+        for keyword in keywords:
+            content.insert(rng.randrange(len(content)), keyword)
+        published_at = timezone.now() - timedelta(seconds=rng.uniform(0, 3 * 86400))
+        return self._article(
+            index,
+            ' '.join(title).capitalize(),
+            ' '.join(content).capitalize() + '.',
+            rng.randrange(self.SOURCE_COUNT),
+            published_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        )
+
+    def _syndicate(self, original, index):
+        """Reword about one word in ten of an earlier story and credit another source"""
+        rng = self.rng
+        words = original["content"].split()
+        for position in rng.sample(range(len(words)), len(words) // 10):
+            words[position] = rng.choice(self.words)
+        title = original["title"].split()
+        title[rng.randrange(len(title))] = rng.choice(self.words)
+        return self._article(
+            index, ' '.join(title), ' '.join(words), rng.randrange(self.SOURCE_COUNT), original["publishedAt"],
+        )
+
+    def _article(self, index, title, content, source, published_at):
+        source_name = f"Synthetic Source {source}"
+        url = f"https://source{source}.example.com/{self.run_id}/{index}"
+        if self.rng.random() < 0.5:
+            return {
+                "source": {"id": f"synthetic-{source}", "name": source_name},
+                "author": f"Reporter {index % 97}",
+                "title": title,
+                "description": content[:120],
+                "url": url,
+                "urlToImage": f"{url}.jpg",
+                "publishedAt": published_at,
+                "content": content,
+            }
+        return {
+            "title": title,
+            "description": content[:120],
+            "content": content,
+            "url": url,
+            "image": f"{url}.jpg",
+            "publishedAt": published_at,
+            "source": {"name": source_name, "url": f"https://source{source}.example.com"},
+        }
+
+    def normalize(self, article):
+        if "image" in article:
+            return GNewsProvider.normalize(self, article)
+        return NewsAPIProvider.normalize(self, article)
@@ -0,0 +1,71 @@
+import logging
+import time
+
+from django.db import IntegrityError, connections
+
+from .models import ProviderRateLimit
+
+logger = logging.getLogger(__name__)
+
+# Give up on a contended bucket after this many lost compare-and-swap rounds
+CAS_ATTEMPTS = 5
+
+
+class ProviderRateLimiter:
+    """Token bucket per provider, persisted in ProviderRateLimit.
+
+    ``limits`` maps provider names to ``{'requests', 'period', 'burst'}``:
+    the bucket holds at most ``burst`` tokens and refills at
+    ``requests / period`` tokens per second. Taking a token is a
+    conditional UPDATE on the values that were read, so concurrent
+    processes never spend the same token twice without needing row locks.
+    """
+
+    def __init__(self, limits, clock=time.time):
+        self.limits = dict(limits or {})
+        self.clock = clock
+
+    def acquire(self, provider):
+        """Take a token; return 0 on success or the seconds to wait before trying again"""
+        limit = self.limits.get(provider)
+        if not limit:
+            return 0.0
+        burst = limit.get('burst', limit['requests'])
+        rate = limit['requests'] / limit['period']
+
+        for attempt in range(CAS_ATTEMPTS):
+            state = self._state(provider, burst)
+            now = self.clock()
+            if state.blocked_until > now:
+                return state.blocked_until - now
+            tokens = min(burst, state.tokens + max(0.0, now - state.refilled_at) * rate)
+            if tokens < 1:
+                return (1 - tokens) / rate
+            taken = ProviderRateLimit.objects.filter(
+                pk=state.pk, tokens=state.tokens, refilled_at=state.refilled_at,
+            ).update(tokens=tokens - 1, refilled_at=now)
+            if taken:
+                return 0.0
+        logger.info(f"Rate limit bucket for {provider} is contended, backing off")
+        return 0.1
+
+    def block(self, provider, seconds):
+        """Stop all requests to a provider for a while, e.g. after a 429 with Retry-After"""
+        limit = self.limits.get(provider) or {}
+        until = self.clock() + seconds
+        self._state(provider, limit.get('burst', limit.get('requests', 1)))
+        ProviderRateLimit.objects.filter(provider=provider, blocked_until__lt=until).update(blocked_until=until)
+
+    def close(self):
+        """Close the calling thread's database connections (fetches run in worker threads)"""
+        connections.close_all()
+
+    def _state(self, provider, burst):
+        try:
+            return ProviderRateLimit.objects.get(provider=provider)
+        except ProviderRateLimit.DoesNotExist:
+            try:
+                return ProviderRateLimit.objects.create(provider=provider, tokens=burst, refilled_at=self.clock())
+            except IntegrityError:
+                # Another process created it first
+                return ProviderRateLimit.objects.get(provider=provider)
@@ -0,0 +1,128 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections
+from django.utils import timezone
+
+from .models import News, UserNews
+
+logger = logging.getLogger(__name__)
+
+
+class ReadBuffer:
+    """Per-user read events waiting to be written to UserNews.
+
+    Recording a read only updates a dict under a lock. A daemon thread
+    writes the pending reads with one bulk_create every ``interval``
+    seconds, or as soon as ``max_pending`` are waiting, and whatever is
+    left is flushed when the process exits. A crash loses at most the
+    reads of one interval. Reads stay visible through ``pending_for``
+    until they are stored.
+    """
+
+    def __init__(self, interval, max_pending):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        # {user_id: {news_id: (read_at, category_mask)}}
+        self._pending = {}
+        self._size = 0
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def record(self, user_id, news_id, category_mask=0):
+        with self._lock:
+            reads = self._pending.setdefault(user_id, {})
+            if news_id not in reads:
+                reads[news_id] = (timezone.now(), category_mask)
+                self._size += 1
+            full = self._size >= self.max_pending
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='read-buffer', daemon=True)
+                self._thread.start()
+        if full:
+            self._wakeup.set()
+
+    def pending_for(self, user_id):
+        """{news_id: category_mask} of the articles this user read that are not stored yet"""
+        with self._lock:
+            return {news_id: mask for news_id, (_, mask) in self._pending.get(user_id, {}).items()}
+
+    def flush(self):
+        """Write the pending reads; return how many were inserted or already there"""
+        with self._lock:
+            pending = {user_id: dict(reads) for user_id, reads in self._pending.items()}
+        if not pending:
+            return 0
+        # Articles removed in the meantime (retention) would fail the foreign key
+        news_ids = {news_id for reads in pending.values() for news_id in reads}
+        existing = set(News.objects.filter(id__in=list(news_ids)).values_list('id', flat=True))
+        rows = [
+            UserNews(user_id=user_id, news_id=news_id, read_at=read_at)
+            for user_id, reads in pending.items()
+            for news_id, (read_at, _) in reads.items()
+            if news_id in existing
+        ]
+        try:
+            UserNews.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+        except IntegrityError:
+            # E.g. a user deleted since; retrying would fail again
+            logger.exception(f"Dropped {len(rows)} read events that could not be stored")
+        except DatabaseError:
+            # Left pending for the next flush
+            logger.exception(f"Could not store {len(rows)} read events; retrying with the next flush")
+            return 0
+        self._discard(pending)
+        # bulk_create sends no signals
+        from .userstate import invalidate_user_states
+        invalidate_user_states(pending)
+        return len(rows)
+
+    def _discard(self, flushed):
+        """Drop reads that were written (or given up on) from the pending ones"""
+        with self._lock:
+            for user_id, reads in flushed.items():
+                current = self._pending.get(user_id, {})
+                for news_id in reads:
+                    if current.pop(news_id, None) is not None:
+                        self._size -= 1
+                if not current:
+                    self._pending.pop(user_id, None)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing read events failed")
+            finally:
+                # This thread's connection would otherwise stay open between flushes
+                connections.close_all()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_read_buffer():
+    """The process-wide ReadBuffer, flushed at exit"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = ReadBuffer(
+                    getattr(settings, 'NEWS_READ_FLUSH_INTERVAL', 5),
+                    getattr(settings, 'NEWS_READ_FLUSH_SIZE', 500),
+                )
+                atexit.register(_buffer.flush)
+    return _buffer
+
+
+def mark_read(user, news):
+    """Record that ``user`` read ``news``; written to UserNews in the background"""
+    get_read_buffer().record(user.pk, news.pk, news.category_mask)
+
@@ -0,0 +1,145 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.db.models import Q
+from django.utils import timezone
+
+from .heartbeat import Heartbeat, HeartbeatLost
+from .models import LeaderLease, RefreshSchedule
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = 'news-refresh'
+
+
+def acquire_lease(name, holder, ttl):
+    """Take or renew a lease; return True if ``holder`` holds it for the next ``ttl`` seconds.
+
+    A single conditional UPDATE succeeds only when the lease is already
+    ours or has expired, so at most one holder wins however many
+    processes race for it.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=ttl)
+    taken = LeaderLease.objects.filter(name=name).filter(
+        Q(holder=holder) | Q(expires_at__lt=now)
+    ).update(holder=holder, expires_at=expires_at)
+    if taken:
+        return True
+    try:
+        LeaderLease.objects.create(name=name, holder=holder, expires_at=expires_at)
+    except IntegrityError:
+        # The lease exists and someone else holds it
+        return False
+    return True
+
+
+def release_lease(name, holder):
+    """Give up a lease early so a standby can take over at its next check"""
+    LeaderLease.objects.filter(name=name, holder=holder).update(expires_at=timezone.now())
+
+
+def get_schedules(providers=None):
+    """Refresh interval in seconds by provider, from NEWS_REFRESH_SCHEDULES and NEWS_REFRESH_INTERVAL"""
+    interval = getattr(settings, 'NEWS_REFRESH_INTERVAL', 3600)
+    schedules = {
+        name: interval
+        for name in (providers or getattr(settings, 'NEWS_PROVIDERS', ['newsapi', 'gnews']))
+    }
+    schedules.update(getattr(settings, 'NEWS_REFRESH_SCHEDULES', {}))
+    return schedules
+
+
+class RefreshScheduler:
+    """Run fetch_news for each provider on its own interval, on one leader only.
+
+    Every scheduler process calls ``tick`` periodically. Only the holder of
+    the ``news-refresh`` lease refreshes anything; the others stay on
+    standby and take over once the leader stops renewing. When each
+    provider ran last and is due next is kept in RefreshSchedule, so a
+    new leader continues the schedule instead of fetching everything at
+    once. The lease is renewed from a heartbeat thread while a refresh
+    runs, and a refresh that loses it stops at its next provider.
+    """
+
+    def __init__(self, schedules, holder, lease_ttl=300, stdout=None):
+        self.schedules = schedules
+        self.holder = holder
+        self.lease_ttl = lease_ttl
+        self.stdout = stdout
+        # None until the first check, so the initial role gets logged too
+        self.is_leader = None
+
+    def tick(self):
+        """Refresh the providers that are due if we are the leader; return whether we are"""
+        leader = acquire_lease(LEASE_NAME, self.holder, self.lease_ttl)
+        if leader != self.is_leader:
+            self.is_leader = leader
+            self.log(f"{self.holder} is {'now the leader' if leader else 'on standby'}")
+        if not leader:
+            return False
+
+        due = self.due_providers()
+        if due:
+            self.refresh(due)
+        return self.is_leader
+
+    def due_providers(self):
+        now = timezone.now()
+        due_at = dict(
+            RefreshSchedule.objects.filter(provider__in=list(self.schedules)).values_list('provider', 'next_run_at')
+        )
+        missing = [RefreshSchedule(provider=name) for name in self.schedules if name not in due_at]
+        if missing:
+            RefreshSchedule.objects.bulk_create(missing, ignore_conflicts=True)
+        return [
+            name for name in self.schedules
+            if due_at.get(name) is None or due_at[name] <= now
+        ]
+
+    def refresh(self, providers):
+        """Fetch the given providers in one run and move their schedules forward"""
+        self.log(f"Refreshing {', '.join(providers)}...")
+        started_at = timezone.now()
+        started = time.monotonic()
+        error = ''
+        lease = Heartbeat(
+            lambda: acquire_lease(LEASE_NAME, self.holder, self.lease_ttl),
+            self.lease_ttl / 3, name=f'Lease {LEASE_NAME} of {self.holder}',
+        )
+        try:
+            with lease:
+                # fetch_news reports progress before each provider, where a lost lease stops it
+                call_command('fetch_news', providers=providers, progress=lease.check)
+        except HeartbeatLost:
+            # Another scheduler leads now and keeps the schedule
+            self.is_leader = False
+            self.log(f"{self.holder} lost the lease during the refresh of {', '.join(providers)}; stopped")
+            return
+        except Exception as e:
+            error = str(e)
+            logger.error(f"Error during scheduled news refresh: {error}")
+        duration = time.monotonic() - started
+
+        for name in providers:
+            RefreshSchedule.objects.filter(provider=name).update(
+                last_run_at=started_at,
+                next_run_at=started_at + timedelta(seconds=self.schedules[name]),
+                last_duration=duration,
+                last_error=error,
+            )
+        self.log(f"Refresh of {', '.join(providers)} {'failed' if error else 'completed'} in {duration:.1f}s")
+
+    def release(self):
+        if self.is_leader:
+            release_lease(LEASE_NAME, self.holder)
+            self.is_leader = False
+
+    def log(self, message):
+        logger.info(message)
+        if self.stdout:
+            self.stdout.write(message)
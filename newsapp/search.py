@@ -0,0 +1,178 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+FTS_TABLE = 'newsapp_news_fts'
+# Markers around matched terms in snippets; replaced by <mark> after escaping
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+_fts_available = {}
+
+
+def search_backend():
+    """'sqlite' or 'postgresql' if the full-text index exists on the default database, else None"""
+    vendor = connection.vendor
+    if vendor not in _fts_available:
+        if vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+                _fts_available[vendor] = cursor.fetchone() is not None
+        elif vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM information_schema.columns WHERE table_name = 'newsapp_news' "
+                    "AND column_name = 'search_vector'"
+                )
+                _fts_available[vendor] = cursor.fetchone() is not None
+        else:
+            _fts_available[vendor] = False
+    return vendor if _fts_available[vendor] else None
+
+
+def search_terms(query):
+    """Lower-case words of a user query, without any search syntax"""
+    return re.findall(r'\w+', query.lower())
+
+
+def highlight(snippet):
+    """Escape a snippet and turn the match markers into <mark> tags"""
+    html = escape(snippet).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+    return mark_safe(html)
+
+
+def search_news(queryset, query):
+    """Restrict a News queryset to articles matching ``query``, best matches first.
+
+    Uses the full-text index when there is one and falls back to
+    icontains filters otherwise. The result works with Paginator either way.
+    """
+    if search_backend() is None:
+        return queryset.filter(
+            Q(title__icontains=query) |
+            Q(content__icontains=query) |
+            Q(author__icontains=query)
+        )
+    return SearchResults(queryset, query)
+
+
+class SearchResults:
+    """Ranked full-text matches for a query within a News queryset.
+
+    Supports ``count()``, ``len()`` and slicing, which is all Paginator
+    needs. Results are the newest ``NEWS_SEARCH_MAX_RESULTS`` matches by
+    id, ranked by relevance. One query over the index finds how many
+    there are and the lowest id among them. Ranking every match of a very
+    common word would be slow, so each page is ranked only over ids from
+    that one upward, with LIMIT/OFFSET. The page's articles are then
+    loaded through the queryset (keeping its select_related and
+    prefetch_related). Each article gets a ``highlighted_title`` and a
+    ``snippet`` of its content with the matched terms marked.
+    """
+
+    def __init__(self, queryset, query):
+        self.queryset = queryset
+        self.terms = search_terms(query)
+        self.max_results = getattr(settings, 'NEWS_SEARCH_MAX_RESULTS', 1000)
+        self.backend = search_backend()
+        self._window = None
+
+    def match_expression(self):
+        """FTS5 query: every term must occur (implicit AND), each quoted so no syntax leaks through"""
+        return ' '.join(f'"{term}"' for term in self.terms)
+
+    def _match(self):
+        """SQL condition and params selecting matching rows; the id column is ``rowid`` on SQLite"""
+        if self.backend == 'sqlite':
+            return 'rowid', f"{FTS_TABLE} MATCH %s", [self.match_expression()]
+        return 'id', "search_vector @@ websearch_to_tsquery('english', %s)", [' '.join(self.terms)]
+
+    def _restriction(self):
+        """SQL restricting matches to the queryset's rows, if it is filtered at all"""
+        if not self.queryset.query.where:
+            return '', []
+        column, condition, params = self._match()
+        # Narrowing the subquery to matching ids first keeps it from scanning every filtered row
+        table = FTS_TABLE if self.backend == 'sqlite' else 'newsapp_news'
+        matches = RawSQL(f"SELECT {column} FROM {table} WHERE {condition}", params)
+        sql, params = self.queryset.filter(id__in=matches).order_by().values('id').query.sql_with_params()
+        return f" AND {column} IN ({sql})", list(params)
+
+    def window(self):
+        """(number of results, lowest id among them), computed once"""
+        if self._window is None:
+            if not self.terms:
+                self._window = (0, None)
+            else:
+                column, condition, params = self._match()
+                restriction, restriction_params = self._restriction()
+                table = FTS_TABLE if self.backend == 'sqlite' else 'newsapp_news'
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"SELECT count(*), min({column}) FROM (SELECT {column} FROM {table} "
+                        f"WHERE {condition}{restriction} ORDER BY {column} DESC LIMIT %s) newest",
+                        [*params, *restriction_params, self.max_results],
+                    )
+                    self._window = cursor.fetchone()
+        return self._window
+
+    def count(self):
+        return self.window()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = min(key.stop if key.stop is not None else self.max_results, self.max_results)
+        if not self.count() or stop <= start:
+            return []
+
+        with connection.cursor() as cursor:
+            cursor.execute(*self._page_sql(start, stop - start))
+            rows = cursor.fetchall()
+        articles = self.queryset.filter(id__in=[row[0] for row in rows]).in_bulk()
+        results = []
+        for news_id, title, snippet in rows:
+            news = articles.get(news_id)
+            if news is not None:
+                news.highlighted_title = highlight(title)
+                news.snippet = highlight(snippet)
+                results.append(news)
+        return results
+
+    def _page_sql(self, offset, limit):
+        column, condition, params = self._match()
+        restriction, restriction_params = self._restriction()
+        lowest_id = self.window()[1]
+        if self.backend == 'sqlite':
+            markers = [HIGHLIGHT_START, HIGHLIGHT_END]
+            sql = (
+                f"SELECT rowid, highlight({FTS_TABLE}, 0, %s, %s), snippet({FTS_TABLE}, 1, %s, %s, '…', 24) "
+                f"FROM {FTS_TABLE} WHERE {condition} AND rowid >= %s{restriction} "
+                "ORDER BY rank LIMIT %s OFFSET %s"
+            )
+            return sql, [*markers, *markers, *params, lowest_id, *restriction_params, limit, offset]
+
+        # ts_headline is expensive, so it only runs on the page's rows
+        markers = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}'
+        sql = (
+            "SELECT page.id, ts_headline('english', page.title, page.query, %s), "
+            "ts_headline('english', page.content, page.query, %s) FROM ("
+            "SELECT id, title, content, query, ts_rank(search_vector, query) AS rank "
+            "FROM newsapp_news, websearch_to_tsquery('english', %s) query "
+            f"WHERE search_vector @@ query AND id >= %s{restriction} "
+            "ORDER BY rank DESC, id DESC LIMIT %s OFFSET %s"
+            ") page ORDER BY page.rank DESC, page.id DESC"
+        )
+        return sql, [
+            f'{markers}, HighlightAll=true', f'{markers}, MaxWords=35, MinWords=15',
+            *params, lowest_id, *restriction_params, limit, offset,
+        ]
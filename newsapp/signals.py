@@ -0,0 +1,187 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .categorizer import refresh_category_masks
+from .counters import adjust_news_counts, recount_news
+from .models import Bookmark, Category, News, NewsCategory, Source
+from .pagecache import bump_content_version
+from .taxonomy import invalidate_taxonomy
+from .userstate import invalidate_user_states
+
+_deferred = threading.local()
+
+
+@contextmanager
+def deferred_category_updates():
+    """Collect what per-row signals would write and write it once on exit.
+
+    For code that changes many articles or links at once (recategorize,
+    retention deletes): category masks of the touched articles are
+    refreshed, article counters moved by their summed changes and the
+    cached pages invalidated once each, instead of per row.
+    """
+    if deferring():
+        # Already deferring; the outermost block applies everything
+        yield
+        return
+    _deferred.news_ids = set()
+    _deferred.counts = {Category: Counter(), Source: Counter()}
+    _deferred.recounts = {Category: set(), Source: set()}
+    _deferred.content_changed = False
+    try:
+        yield
+        refresh_category_masks(_deferred.news_ids)
+        for model, deltas in _deferred.counts.items():
+            recounts = _deferred.recounts[model]
+            # A recount includes every change so far; adding their deltas too would count them twice
+            adjust_news_counts(model, {pk: delta for pk, delta in deltas.items() if pk not in recounts})
+            if recounts:
+                recount_news(model, recounts)
+        if _deferred.content_changed:
+            transaction.on_commit(bump_content_version)
+    finally:
+        _deferred.news_ids = None
+
+
+def deferring():
+    return getattr(_deferred, 'news_ids', None) is not None
+
+
+def category_links_changed(news_ids):
+    """Refresh the masks of articles whose links changed, or note them inside deferred_category_updates"""
+    news_ids = [news_id for news_id in news_ids if news_id is not None]
+    if deferring():
+        _deferred.news_ids.update(news_ids)
+    else:
+        refresh_category_masks(news_ids)
+
+
+def news_counts_changed(model, deltas):
+    """Move news_count of categories or sources by ``deltas``, or note them inside deferred_category_updates"""
+    deltas = {pk: delta for pk, delta in deltas.items() if pk is not None}
+    if deferring():
+        _deferred.counts[model].update(deltas)
+    else:
+        adjust_news_counts(model, deltas)
+
+
+def news_counts_stale(model, pks):
+    """Recount categories or sources exactly, for changes that don't say how many rows they touched"""
+    pks = {pk for pk in pks if pk is not None}
+    if deferring():
+        _deferred.recounts[model].update(pks)
+    elif pks:
+        recount_news(model, pks)
+
+
+@receiver(pre_save, sender=NewsCategory)
+def remember_previous_link(sender, instance, raw=False, **kwargs):
+    """An edited link may have moved to another article or category, which change too"""
+    instance._previous_link = None
+    if instance.pk and not raw:
+        instance._previous_link = (
+            NewsCategory.objects.filter(pk=instance.pk).values_list('news_id', 'category_id').first()
+        )
+
+
+@receiver(post_save, sender=NewsCategory)
+def news_category_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_news_id, previous_category_id = getattr(instance, '_previous_link', None) or (None, None)
+    category_links_changed([instance.news_id, previous_news_id])
+    if created:
+        news_counts_changed(Category, {instance.category_id: 1})
+    elif previous_category_id is not None and previous_category_id != instance.category_id:
+        news_counts_changed(Category, {previous_category_id: -1, instance.category_id: 1})
+
+
+@receiver(post_delete, sender=NewsCategory)
+def news_category_deleted(sender, instance, **kwargs):
+    category_links_changed([instance.news_id])
+    news_counts_changed(Category, {instance.category_id: -1})
+
+
+@receiver(m2m_changed, sender=NewsCategory)
+def news_categories_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """news.categories.add()/remove()/clear() and their reverse from Category bulk-write NewsCategory"""
+    if action == 'pre_clear':
+        if reverse:
+            instance._cleared_news_ids = list(
+                NewsCategory.objects.filter(category=instance).values_list('news_id', flat=True)
+            )
+        else:
+            instance._cleared_category_ids = list(
+                NewsCategory.objects.filter(news=instance).values_list('category_id', flat=True)
+            )
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        # remove() reports the ids it was given rather than the rows it deleted, so counts are recomputed
+        if not reverse:
+            category_links_changed([instance.pk])
+            news_counts_stale(Category, instance._cleared_category_ids if action == 'post_clear' else pk_set)
+        else:
+            category_links_changed(instance._cleared_news_ids if action == 'post_clear' else pk_set)
+            news_counts_stale(Category, [instance.pk])
+
+
+@receiver(pre_save, sender=News)
+def remember_previous_source(sender, instance, raw=False, update_fields=None, **kwargs):
+    """An article moved to another source changes both sources' counts"""
+    instance._previous_source_id = None
+    if not instance._state.adding and not raw and (update_fields is None or 'source' in update_fields):
+        instance._previous_source_id = (
+            News.objects.filter(pk=instance.pk).values_list('source_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=News)
+def news_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_source_id = getattr(instance, '_previous_source_id', None)
+    if created:
+        news_counts_changed(Source, {instance.source_id: 1})
+    elif previous_source_id is not None and previous_source_id != instance.source_id:
+        news_counts_changed(Source, {previous_source_id: -1, instance.source_id: 1})
+
+
+@receiver(post_delete, sender=News)
+def news_deleted(sender, instance, **kwargs):
+    news_counts_changed(Source, {instance.source_id: -1})
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Source)
+@receiver(post_delete, sender=Source)
+def content_changed(sender, update_fields=None, raw=False, **kwargs):
+    """Edits that change what the cached pages show invalidate them once committed"""
+    if raw or (update_fields and set(update_fields) <= {'is_read'}):
+        return
+    if deferring():
+        _deferred.content_changed = True
+    else:
+        transaction.on_commit(bump_content_version)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Source)
+@receiver(post_delete, sender=Source)
+def taxonomy_changed(sender, **kwargs):
+    """Every process reloads its category and source registry once the change is committed"""
+    transaction.on_commit(invalidate_taxonomy)
+
+
+@receiver(post_save, sender=Bookmark)
+@receiver(post_delete, sender=Bookmark)
+def bookmarks_changed(sender, instance, **kwargs):
+    """The user's cached read/bookmark state is reloaded once the change is committed"""
+    transaction.on_commit(lambda: invalidate_user_states([instance.user_id]))
@@ -0,0 +1,88 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Category, Source
+from .pagecache import bump_cache_version, cache_is_shared, cache_version, get_cache
+
+logger = logging.getLogger(__name__)
+
+TAXONOMY_VERSION_KEY = 'newsapp:taxonomy-version'
+
+# (version, Taxonomy) last loaded by this process
+_loaded = None
+
+
+class Taxonomy:
+    """All categories and sources, sorted by name, with lookups by id.
+
+    The instances are shared by every request of the process, so
+    callers must treat them as read-only.
+    """
+
+    def __init__(self, categories, sources):
+        self.categories = categories
+        self.sources = sources
+        self.category_by_id = {category.pk: category for category in categories}
+        self.source_by_id = {source.pk: source for source in sources}
+
+    def get_categories(self, ids):
+        """Categories for ids as they come from a query string; unknown or malformed ids are skipped"""
+        return lookup(self.category_by_id, ids)
+
+    def get_sources(self, ids):
+        """Sources for ids as they come from a query string; unknown or malformed ids are skipped"""
+        return lookup(self.source_by_id, ids)
+
+
+def lookup(by_id, ids):
+    found = []
+    for value in ids:
+        try:
+            item = by_id.get(int(value))
+        except (TypeError, ValueError):
+            continue
+        if item is not None and item not in found:
+            found.append(item)
+    return found
+
+
+def get_taxonomy():
+    """The current Taxonomy.
+
+    Costs one cache read for the version when this process already has
+    it loaded. Otherwise it comes from the shared cache, so only the
+    first process after a change queries the database. Inside a
+    transaction, or when the cache isn't shared with the processes that
+    create sources and categories on ingest, it is always loaded fresh.
+    """
+    global _loaded
+    if transaction.get_connection().in_atomic_block or not cache_is_shared():
+        # In a transaction it may see uncommitted rows; caching them would outlive a rollback
+        return Taxonomy(*load_taxonomy())
+
+    version = cache_version(TAXONOMY_VERSION_KEY)
+    loaded = _loaded
+    if loaded is not None and loaded[0] == version:
+        return loaded[1]
+
+    cache = get_cache()
+    key = f'newsapp:taxonomy:{version}'
+    data = cache.get(key)
+    if data is None:
+        data = load_taxonomy()
+        cache.set(key, data, getattr(settings, 'NEWS_TAXONOMY_CACHE_TIMEOUT', 86400))
+        logger.debug(f"Loaded taxonomy version {version}: {len(data[0])} categories, {len(data[1])} sources")
+    taxonomy = Taxonomy(*data)
+    _loaded = (version, taxonomy)
+    return taxonomy
+
+
+def load_taxonomy():
+    return list(Category.objects.order_by('name')), list(Source.objects.order_by('name'))
+
+
+def invalidate_taxonomy():
+    """Make every process reload categories and sources on next use"""
+    bump_cache_version(TAXONOMY_VERSION_KEY)
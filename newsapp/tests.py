@@ -1,3 +1,348 @@
-from django.test import TestCase
+import hashlib
+import io
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import jobs
+from .feeds import fan_out, feed_page, trim_feeds
+from .ingest import ArticleIngestor, NormalizedArticle
+from .management.commands.fetch_news import Command as FetchNewsCommand
+from .models import Category, FeedEntry, FetchCursor, Job, News, NewsCategory, Source, UserPreference
+from .pagination import CursorPaginator, decode_cursor, encode_cursor
+from .providers import get_provider
+
+# Tests keep their cache to themselves instead of sharing the project's file-based one
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def make_source(name='Test Source'):
+    return Source.objects.create(name=name, website_url='https://example.com', country='Testland')
+
+
+def make_news(source, title, published_at, url=None):
+    return News.objects.create(
+        title=title, content=f'{title} content', published_at=published_at, source=source,
+        url=url or f'https://example.com/{title.lower().replace(" ", "-")}',
+    )
+
+
+def make_article(title, published_at, source_name='Test Source'):
+    # Words of its own, so articles aren't taken for near-duplicates of each other
+    content = ' '.join(hashlib.md5(f'{title} {n}'.encode()).hexdigest()[:10] for n in range(12))
+    return NormalizedArticle(
+        title, content, published_at, f'https://example.com/{title.lower().replace(" ", "-")}', source_name,
+    )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        source = make_source()
+        self.now = timezone.now().replace(microsecond=0)
+        # Pairs share a publication time, so pages have to break ties by id
+        self.news = [make_news(source, f'Article {i}', self.now - timedelta(minutes=i // 2)) for i in range(7)]
+        self.feed_order = sorted(self.news, key=lambda news: (news.published_at, news.pk), reverse=True)
+
+    def test_cursor_round_trip(self):
+        token = encode_cursor('next', self.now, 42)
+        self.assertEqual(decode_cursor(token), ('next', self.now, 42))
+
+    def test_invalid_cursors_decode_to_none(self):
+        for token in ('', 'not a cursor', encode_cursor('sideways', self.now, 1), 'e30'):
+            self.assertIsNone(decode_cursor(token), token)
+
+    def test_pages_forward_and_back(self):
+        paginator = CursorPaginator(News.objects.all(), 3)
+        first = paginator.page(None)
+        self.assertEqual(list(first), self.feed_order[:3])
+        self.assertFalse(first.has_previous())
+
+        second = paginator.page(first.next_cursor)
+        self.assertEqual(list(second), self.feed_order[3:6])
+        third = paginator.page(second.next_cursor)
+        self.assertEqual(list(third), self.feed_order[6:])
+        self.assertFalse(third.has_next())
+
+        self.assertEqual(list(paginator.page(third.previous_cursor)), self.feed_order[3:6])
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        page = CursorPaginator(News.objects.all(), 3).page('garbage')
+        self.assertEqual(list(page), self.feed_order[:3])
+
+    def test_previous_page_after_the_feed_grew(self):
+        paginator = CursorPaginator(News.objects.all(), 3)
+        second = paginator.page(paginator.page(None).next_cursor)
+        make_news(self.news[0].source, 'Breaking', self.now + timedelta(minutes=5))
+        previous = paginator.page(second.previous_cursor)
+        self.assertEqual(list(previous), self.feed_order[:3])
+        self.assertTrue(previous.has_previous())
+
+    def test_stale_previous_cursor_starts_over_from_newest(self):
+        paginator = CursorPaginator(News.objects.all(), 3)
+        second = paginator.page(paginator.page(None).next_cursor)
+        # Articles above the cursor were deleted; going back must not return a short page
+        self.feed_order[0].delete()
+        previous = paginator.page(second.previous_cursor)
+        self.assertEqual(list(previous), self.feed_order[1:4])
+        self.assertFalse(previous.has_previous())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CategorySyncTests(TestCase):
+    def setUp(self):
+        self.source = make_source()
+        self.politics = Category.objects.create(name='Politics')
+        self.sports = Category.objects.create(name='Sports')
+        self.news = make_news(self.source, 'Election night', timezone.now())
+
+    def assertSynced(self, news, categories):
+        news.refresh_from_db()
+        mask = 0
+        for category in categories:
+            mask |= category.mask
+        self.assertEqual(news.category_mask, mask)
+        for category in Category.objects.all():
+            self.assertEqual(category.news_count, NewsCategory.objects.filter(category=category).count())
+
+    def test_categories_get_bits(self):
+        self.assertIsNotNone(self.politics.bit)
+        self.assertNotEqual(self.politics.bit, self.sports.bit)
+
+    def test_link_save_edit_and_delete(self):
+        link = NewsCategory.objects.create(news=self.news, category=self.politics)
+        self.assertSynced(self.news, [self.politics])
+        link.category = self.sports
+        link.save()
+        self.assertSynced(self.news, [self.sports])
+        link.delete()
+        self.assertSynced(self.news, [])
+
+    def test_m2m_add_remove_clear(self):
+        self.news.categories.add(self.politics, self.sports)
+        self.assertSynced(self.news, [self.politics, self.sports])
+        self.news.categories.remove(self.politics)
+        self.assertSynced(self.news, [self.sports])
+        self.news.categories.clear()
+        self.assertSynced(self.news, [])
+
+    def test_reverse_m2m_add_and_clear(self):
+        other = make_news(self.source, 'Cup final', timezone.now())
+        self.sports.news_set.add(self.news, other)
+        self.assertSynced(other, [self.sports])
+        self.sports.news_set.clear()
+        self.assertSynced(self.news, [])
+        self.assertSynced(other, [])
+
+    def test_admin_add_and_delete_link(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse('admin:newsapp_newscategory_add'), {'news': self.news.pk, 'category': self.politics.pk},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertSynced(self.news, [self.politics])
+
+        link = NewsCategory.objects.get(news=self.news)
+        response = self.client.post(reverse('admin:newsapp_newscategory_delete', args=[link.pk]), {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.assertSynced(self.news, [])
+
+    def test_source_counts_follow_news(self):
+        other = make_source('Other Source')
+        self.source.refresh_from_db()
+        self.assertEqual(self.source.news_count, 1)
+        self.news.source = other
+        self.news.save()
+        self.source.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.source.news_count, other.news_count), (0, 1))
+
+    def test_category_delete_cascades_once(self):
+        others = [make_news(self.source, f'Vote {i}', timezone.now()) for i in range(5)]
+        for news in [self.news] + others:
+            news.categories.add(self.politics, self.sports)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.politics.delete()
+        for news in [self.news] + others:
+            self.assertSynced(news, [self.sports])
+        # Masks, counters and the content version are updated for the whole cascade, not per link
+        self.assertLessEqual(len(callbacks), 3)
+
+    def test_source_and_news_deletes_cascade(self):
+        other_source = make_source('Other Source')
+        kept = make_news(other_source, 'Kept', timezone.now())
+        for news in (self.news, kept):
+            news.categories.add(self.politics)
+        self.source.delete()
+        self.assertSynced(kept, [self.politics])
+
+        News.objects.filter(pk=kept.pk).delete()
+        self.politics.refresh_from_db()
+        other_source.refresh_from_db()
+        self.assertEqual((self.politics.news_count, other_source.news_count), (0, 0))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        jobs.register_job('test')(lambda job, **arguments: {'arguments': arguments})
+
+    def tearDown(self):
+        jobs.JOB_HANDLERS.pop('test', None)
+
+    def test_enqueue_returns_the_job_in_flight(self):
+        job = jobs.enqueue('test', n=1)
+        self.assertEqual(jobs.enqueue('test', n=1), job)
+        self.assertNotEqual(jobs.enqueue('test', n=2), job)
+
+    def test_claim_skips_a_job_claimed_concurrently(self):
+        first = jobs.enqueue('test', n=1)
+        second = jobs.enqueue('test', n=2)
+        real_now = timezone.now
+
+        def claimed_by_other_worker():
+            # Runs between reading the queued jobs and the conditional update
+            Job.objects.filter(pk=first.pk).update(status=Job.RUNNING, worker='other')
+            return real_now()
+
+        with mock.patch('newsapp.jobs.timezone.now', side_effect=claimed_by_other_worker):
+            claimed = jobs.claim_next('worker-1')
+        self.assertEqual(claimed.pk, second.pk)
+        self.assertEqual((claimed.status, claimed.worker), (Job.RUNNING, 'worker-1'))
+        self.assertIsNone(jobs.claim_next('worker-2'))
+
+    def test_run_job_stores_the_result(self):
+        jobs.enqueue('test', n=1)
+        job = jobs.run_job(jobs.claim_next('worker-1'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.progress), (Job.DONE, {'arguments': {'n': 1}}, 1.0))
+
+    def test_stale_job_is_not_overwritten_by_its_old_worker(self):
+        def taken_over(job, **arguments):
+            Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+            self.assertEqual(jobs.fail_stale_jobs(60), 1)
+            self.assertFalse(jobs.keep_alive(job))
+            Job.objects.filter(pk=job.pk).update(status=Job.QUEUED)
+            self.assertEqual(jobs.claim_next('worker-2').pk, job.pk)
+            return {'stale': True}
+
+        jobs.register_job('test')(taken_over)
+        jobs.enqueue('test', n=1)
+        job = jobs.run_job(jobs.claim_next('worker-1'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.result), (Job.RUNNING, 'worker-2', {}))
+
+    def test_failed_handler_of_stale_job_is_dropped(self):
+        def taken_over(job, **arguments):
+            Job.objects.filter(pk=job.pk).update(status=Job.FAILED, worker='')
+            raise RuntimeError('too late')
+
+        jobs.register_job('test')(taken_over)
+        jobs.enqueue('test', n=1)
+        job = jobs.run_job(jobs.claim_next('worker-1'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (Job.FAILED, ''))
+
+    def test_progress_after_losing_the_heartbeat_stops_the_handler(self):
+        jobs.enqueue('test', n=1)
+        job = jobs.claim_next('worker-1')
+        job.heartbeat = jobs.Heartbeat(lambda: True, 60)
+        job.heartbeat.lost.set()
+        with self.assertRaises(jobs.HeartbeatLost):
+            jobs.report_progress(job, 0.5, 'halfway')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class FetchCursorTests(TestCase):
+    def setUp(self):
+        self.provider = get_provider('newsapi')
+        self.command = FetchNewsCommand(stdout=io.StringIO())
+        self.command.ingestor = ArticleIngestor(stdout=None)
+        self.command.use_cursors = True
+        self.command.cursors = {}
+        self.now = timezone.now()
+
+    def ingest(self, articles):
+        return self.command.ingest_response(self.provider, 'top', articles)
+
+    def test_second_fetch_skips_what_the_cursor_has_seen(self):
+        older = [make_article(f'Story {i}', self.now - timedelta(hours=i + 1)) for i in range(3)]
+        self.assertEqual(self.ingest(older), 3)
+        cursor = FetchCursor.objects.get(provider='newsapi', source_key='top')
+        self.assertEqual(cursor.last_published_at, older[0].published_at)
+
+        newest = make_article('Story new', self.now)
+        with mock.patch.object(self.command.ingestor, 'ingest', wraps=self.command.ingestor.ingest) as ingest:
+            self.assertEqual(self.ingest(older + [newest]), 1)
+        self.assertEqual([article.title for article in ingest.call_args.args[0]], ['Story new'])
+        self.assertEqual(News.objects.count(), 4)
+
+    def test_cursor_created_by_a_concurrent_fetch_is_merged(self):
+        # Another fetch stored the cursor after this one loaded its (empty) cursors
+        FetchCursor.objects.create(
+            provider='newsapi', source_key='top',
+            last_published_at=self.now + timedelta(hours=1), seen_urls=['https://example.com/other'],
+        )
+        self.ingest([make_article('Story 1', self.now)])
+        cursor = FetchCursor.objects.get(provider='newsapi', source_key='top')
+        self.assertEqual(cursor.last_published_at, self.now + timedelta(hours=1))
+        self.assertEqual(cursor.seen_urls, ['https://example.com/story-1', 'https://example.com/other'])
+
+    def test_full_fetch_ignores_cursors(self):
+        self.ingest([make_article('Story 1', self.now)])
+        self.command.use_cursors = False
+        self.ingest([make_article('Story 1', self.now), make_article('Story 2', self.now)])
+        self.assertEqual(News.objects.count(), 2)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class FeedFanOutTests(TestCase):
+    def setUp(self):
+        self.source = make_source()
+        self.other_source = make_source('Other Source')
+        self.reader = User.objects.create_user('reader')
+        preference = UserPreference.objects.create(user=self.reader, feed_precomputed=True)
+        preference.preferred_sources.add(self.source)
+        # Has preferences too, but its feed is queried rather than precomputed
+        self.browser = User.objects.create_user('browser')
+        UserPreference.objects.create(user=self.browser).preferred_sources.add(self.source)
+        self.now = timezone.now()
+
+    def test_fan_out_adds_matching_articles_to_precomputed_feeds(self):
+        matching = make_news(self.source, 'Matching', self.now)
+        other = make_news(self.other_source, 'Other', self.now)
+        self.assertEqual(fan_out([matching, other]), 1)
+        self.assertEqual(list(FeedEntry.objects.values_list('user_id', 'news_id')), [(self.reader.pk, matching.pk)])
+        self.assertEqual(list(feed_page(self.reader, None)), [matching])
+
+    def test_ingest_fans_out(self):
+        ArticleIngestor(stdout=None).ingest([
+            make_article('Ours', self.now), make_article('Theirs', self.now, source_name='Other Source'),
+        ])
+        self.assertEqual(
+            list(FeedEntry.objects.filter(user=self.reader).values_list('news__title', flat=True)), ['Ours'],
+        )
+
+    @override_settings(NEWS_FEED_MAX_ENTRIES=3)
+    def test_fan_out_trims_feeds_to_the_newest_entries(self):
+        news = [make_news(self.source, f'Article {i}', self.now - timedelta(minutes=i)) for i in range(5)]
+        fan_out(news[2:])
+        fan_out(news[:2])
+        self.assertEqual(
+            set(FeedEntry.objects.filter(user=self.reader).values_list('news_id', flat=True)),
+            {n.pk for n in news[:3]},
+        )
+
+    @override_settings(NEWS_FEED_MAX_ENTRIES=2)
+    def test_trim_feeds(self):
+        news = [make_news(self.source, f'Article {i}', self.now - timedelta(minutes=i)) for i in range(4)]
+        FeedEntry.objects.bulk_create(
+            FeedEntry(user=self.reader, news=n, published_at=n.published_at) for n in news
+        )
+        self.assertEqual(trim_feeds(), 2)
+        self.assertEqual(list(feed_page(self.reader, None)), news[:2])
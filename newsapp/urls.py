@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.home, name='home'),
@@ -11,4 +11,9 @@ urlpatterns = [
     path('categories/', views.categories, name='categories'),
     path('sources/', views.sources, name='sources'),
     path('register/', views.register, name='register'),
+    path('jobs/<int:job_id>/', views.job_status, name='job_status'),
+    path('api/news/', api.news_list, name='api_news'),
+    path('api/news/<int:news_id>/', api.news_detail, name='api_news_detail'),
+    path('api/categories/', api.categories, name='api_categories'),
+    path('api/sources/', api.sources, name='api_sources'),
 ] 
\ No newline at end of file
@@ -0,0 +1,107 @@
+from array import array
+from collections import defaultdict
+
+from django.conf import settings
+
+from .models import Bookmark, UserNews
+from .pagecache import bump_cache_version, cache_is_shared, cache_version, get_cache
+from .reads import get_read_buffer
+
+
+class UserState:
+    """The articles a user has bookmarked and read.
+
+    Ids are kept as 64-bit arrays, which pickle to 8 bytes per id in
+    the cache; the read ones are grouped by the article's category_mask
+    at the time, which is all that unread counts per category need.
+    Lookups go through sets built once per request.
+    """
+
+    def __init__(self, bookmarked=(), read_by_mask=None):
+        self.bookmarked = array('q', bookmarked)
+        self.read_by_mask = read_by_mask or {}
+        self.bookmarked_ids = set(self.bookmarked)
+        self.read_ids = {news_id for ids in self.read_by_mask.values() for news_id in ids}
+
+    def __getstate__(self):
+        return self.bookmarked, self.read_by_mask
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def is_bookmarked(self, news_id):
+        return news_id in self.bookmarked_ids
+
+    def is_read(self, news_id):
+        return news_id in self.read_ids
+
+    def add_reads(self, reads):
+        """Include reads not stored yet ({news_id: category_mask})"""
+        for news_id, mask in reads.items():
+            if news_id not in self.read_ids:
+                self.read_by_mask.setdefault(mask, array('q')).append(news_id)
+                self.read_ids.add(news_id)
+
+    def annotate(self, news_list):
+        """Set ``is_bookmarked`` and ``is_read_by_user`` on each article; no queries"""
+        for news in news_list:
+            news.is_bookmarked = news.pk in self.bookmarked_ids
+            news.is_read_by_user = news.pk in self.read_ids
+        return news_list
+
+    def unread_counts(self, categories):
+        """{category id: articles not read yet}, from Category.news_count and the read masks.
+
+        None for categories without a mask bit. Reads of articles deleted
+        since the state was loaded still count until it is reloaded.
+        """
+        counts = {}
+        for category in categories:
+            if category.bit is None:
+                counts[category.pk] = None
+                continue
+            read = sum(len(ids) for mask, ids in self.read_by_mask.items() if mask & category.mask)
+            counts[category.pk] = max(category.news_count - read, 0)
+        return counts
+
+
+def user_state_version_key(user_id):
+    return f'newsapp:user-state-version:{user_id}'
+
+
+def load_user_state(user_id):
+    bookmarked = Bookmark.objects.filter(user_id=user_id).order_by('news_id').values_list('news_id', flat=True)
+    read_by_mask = defaultdict(lambda: array('q'))
+    for news_id, mask in UserNews.objects.filter(user_id=user_id).values_list('news_id', 'news__category_mask'):
+        read_by_mask[mask].append(news_id)
+    return UserState(bookmarked, dict(read_by_mask))
+
+
+def get_user_state(user):
+    """The user's UserState: one cache read for the version and one for the state, or two queries on a miss.
+
+    Includes this process's reads that are still waiting to be stored.
+    Anonymous visitors get an empty state without touching the cache.
+    States are only cached in a cache all processes share, since any of
+    them may invalidate one.
+    """
+    if not user.is_authenticated:
+        return UserState()
+    if not cache_is_shared():
+        state = load_user_state(user.pk)
+        state.add_reads(get_read_buffer().pending_for(user.pk))
+        return state
+    cache = get_cache()
+    key = f'newsapp:user-state:{user.pk}:{cache_version(user_state_version_key(user.pk))}'
+    state = cache.get(key)
+    if state is None:
+        state = load_user_state(user.pk)
+        cache.set(key, state, getattr(settings, 'NEWS_USER_STATE_TIMEOUT', 3600))
+    state.add_reads(get_read_buffer().pending_for(user.pk))
+    return state
+
+
+def invalidate_user_states(user_ids):
+    """Make the next request of each user reload their state"""
+    for user_id in user_ids:
+        bump_cache_version(user_state_version_key(user_id))
@@ -1,27 +1,38 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, Count
-from .models import News, Category, Source, Comment, Bookmark
+from django.http import JsonResponse
+from .models import News, Category, Source, Comment, Bookmark, Job
+from .categorizer import attach_categories, filter_by_categories
+from .conditional import article_validators, conditional_page
+from .feeds import feed_page, rebuild_feed
+from .fragments import BOOKMARK_ROW, NEWS_CARD, attach_cards
+from .jobs import enqueue
+from .pagecache import cache_anonymous_page
+from .pagination import CursorPaginator
+from .reads import mark_read
+from .search import search_news
+from .taxonomy import get_taxonomy
+from .userstate import get_user_state, invalidate_user_states
 from django.contrib import messages
 from django.utils import timezone
 from django.core.paginator import Paginator
-from django.core.management import call_command
 from django.contrib.auth.models import User
 from django.contrib.auth import login
 
+@conditional_page()
+@cache_anonymous_page(params=('categories', 'sources', 'q', 'page', 'cursor'))
 def home(request):
     """Home page view displaying latest news."""
     # Check if refresh_news parameter is present and user is staff
     if request.GET.get('refresh_news') and request.user.is_staff:
-        try:
-            # Call the fetch_news command
-            call_command('fetch_news')
-            messages.success(request, 'News successfully fetched from APIs!')
-        except Exception as e:
-            messages.error(request, f'Error fetching news: {str(e)}')
+        # Queue the fetch for the worker instead of running it in this request
+        job = enqueue('fetch_news')
+        messages.info(request, f'News refresh queued (job #{job.id}). New articles appear once it finishes.')
+        return redirect('home')
     
-    news_list = News.objects.select_related('source').prefetch_related('categories').order_by('-published_at')
-    categories = Category.objects.all()
+    news_list = News.objects.select_related('source').order_by('-published_at')
+    taxonomy = get_taxonomy()
+    categories = taxonomy.categories
     
     # Handle multi-category selection with the "Add to Filter" functionality
     if request.GET.get('multi_select') == 'true':
@@ -54,10 +65,13 @@ def home(request):
         
         return redirect(redirect_url)
     
+    # "My feed" shows the articles matching the user's preferences instead of the filters below
+    feed_mode = request.GET.get('feed') == 'mine' and request.user.is_authenticated
+    
     # Filter by multiple categories if specified
     selected_categories = request.GET.getlist('categories')
     if selected_categories:
-        news_list = news_list.filter(categories__id__in=selected_categories).distinct()
+        news_list = filter_by_categories(news_list, taxonomy.get_categories(selected_categories))
     
     # Filter by multiple sources if specified
     selected_sources = request.GET.getlist('sources')
@@ -67,47 +81,89 @@ def home(request):
     # Search functionality
     query = request.GET.get('q')
     if query:
-        news_list = news_list.filter(
-            Q(title__icontains=query) | 
-            Q(content__icontains=query) |
-            Q(author__icontains=query)
-        )
+        news_list = search_news(news_list, query)
     
     # Pagination
-    paginator = Paginator(news_list, 10)
-    page_number = request.GET.get('page')
-    news_items = paginator.get_page(page_number)
+    page_range = None
+    if feed_mode:
+        news_items = feed_page(request.user, request.GET.get('cursor'))
+    elif query:
+        # Search results are capped and ranked, so numbered pages stay cheap
+        paginator = Paginator(news_list, 10)
+        news_items = paginator.get_page(request.GET.get('page'))
+        page_range = paginator.get_elided_page_range(news_items.number, on_each_side=2, on_ends=1)
+    else:
+        # The feed pages by cursor, so deep pages cost the same as the first. Content is
+        # only needed to render cards missing from the cache, which loads it for those
+        news_items = CursorPaginator(news_list.defer('content'), 10).page(request.GET.get('cursor'))
     
-    sources = Source.objects.all()
+    # Badges come from each article's category_mask instead of a prefetch, and the
+    # rendered cards from the fragment cache
+    news_items.object_list = attach_cards(
+        attach_categories(list(news_items.object_list), categories), NEWS_CARD,
+    )
+    # Read and bookmarked markers for the whole page from the user's cached state
+    get_user_state(request.user).annotate(news_items.object_list)
+    
+    sources = taxonomy.sources
+    
+    # Staff see the progress of a refresh that is still running
+    refresh_job = None
+    if request.user.is_staff:
+        refresh_job = Job.objects.filter(kind='fetch_news', status__in=Job.IN_FLIGHT).order_by('-created_at').first()
     
     context = {
         'news_items': news_items,
+        'page_range': page_range,
         'categories': categories,
         'sources': sources,
         'selected_categories': selected_categories,
         'selected_sources': selected_sources,
+        # Names for the active filter badges, looked up by id
+        'active_categories': taxonomy.get_categories(selected_categories),
+        'active_sources': taxonomy.get_sources(selected_sources),
         'query': query,
+        'feed_mode': feed_mode,
+        'refresh_job': refresh_job,
     }
     return render(request, 'newsapp/home.html', context)
 
+def job_status(request, job_id):
+    """JSON status of a background job, for polling from the page."""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Staff access required'}, status=403)
+    job = get_object_or_404(Job, id=job_id)
+    return JsonResponse({
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'result': job.result,
+        'articles_added': job.result.get('articles_added'),
+        'error': job.error,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    })
+
+@conditional_page(article_validators)
 def news_detail(request, news_id):
     """View for displaying a single news article and its comments."""
     news = get_object_or_404(News, id=news_id)
     comments = Comment.objects.filter(news=news).select_related('user').order_by('-created_at')
+    syndicated_copies = news.syndicated_copies.select_related('source').order_by('published_at')
+    attach_categories([news], get_taxonomy().categories)
+    is_bookmarked = get_user_state(request.user).is_bookmarked(news.pk)
     
-    # Mark as read
+    # Mark as read; buffered and written to UserNews in batches, not in this request
     if request.user.is_authenticated:
-        news.is_read = True
-        news.save()
-        
-        # Check if bookmarked
-        is_bookmarked = Bookmark.objects.filter(user=request.user, news=news).exists()
-    else:
-        is_bookmarked = False
+        mark_read(request.user, news)
     
     context = {
         'news': news,
         'comments': comments,
+        'syndicated_copies': syndicated_copies,
         'is_bookmarked': is_bookmarked,
     }
     return render(request, 'newsapp/news_detail.html', context)
@@ -153,9 +209,12 @@ def toggle_bookmark(request, news_id):
 @login_required
 def bookmarks(request):
     """Display user's bookmarked news articles."""
-    bookmarked_news = News.objects.filter(
-        bookmark__user=request.user
-    ).select_related('source').prefetch_related('categories').order_by('-bookmark__saved_at')
+    bookmarked_news = attach_categories(
+        list(News.objects.filter(bookmark__user=request.user).select_related('source').order_by('-bookmark__saved_at')),
+        get_taxonomy().categories,
+    )
+    attach_cards(bookmarked_news, BOOKMARK_ROW)
+    get_user_state(request.user).annotate(bookmarked_news)
     
     context = {
         'bookmarked_news': bookmarked_news,
@@ -168,8 +227,7 @@ def user_preferences(request):
     from .models import UserPreference
     
     preference, created = UserPreference.objects.get_or_create(user=request.user)
-    categories = Category.objects.all()
-    sources = Source.objects.all()
+    taxonomy = get_taxonomy()
     
     if request.method == 'POST':
         dark_mode = request.POST.get('dark_mode') == 'on'
@@ -179,35 +237,46 @@ def user_preferences(request):
         preference.dark_mode = dark_mode
         preference.save()
         
-        preference.preferred_categories.clear()
-        for category_id in preferred_categories:
-            preference.preferred_categories.add(category_id)
-        
-        preference.preferred_sources.clear()
-        for source_id in preferred_sources:
-            preference.preferred_sources.add(source_id)
+        preference.preferred_categories.set(preferred_categories)
+        preference.preferred_sources.set(preferred_sources)
+        # Writes only the entries the change adds or removes
+        rebuild_feed(preference)
+        # Every page shows dark mode, and "My feed" the preferences; their ETags change with the user's state
+        invalidate_user_states([request.user.pk])
         
         messages.success(request, 'Preferences updated successfully!')
     
     context = {
         'preference': preference,
-        'categories': categories,
-        'sources': sources,
+        'categories': taxonomy.categories,
+        'sources': taxonomy.sources,
+        # Ids rather than preference.preferred_*.all, which would query once per checkbox
+        'preferred_category_ids': set(preference.preferred_categories.values_list('id', flat=True)),
+        'preferred_source_ids': set(preference.preferred_sources.values_list('id', flat=True)),
     }
     return render(request, 'newsapp/preferences.html', context)
 
+@conditional_page()
+@cache_anonymous_page()
 def categories(request):
     """View all categories and their news counts."""
-    categories = Category.objects.annotate(news_count=Count('news')).order_by('name')
+    # news_count is maintained by ingest and signals, so this reads one row per category
+    categories = list(Category.objects.order_by('name'))
+    if request.user.is_authenticated:
+        unread = get_user_state(request.user).unread_counts(categories)
+        for category in categories:
+            category.unread_count = unread[category.pk]
     
     context = {
         'categories': categories,
     }
     return render(request, 'newsapp/categories.html', context)
 
+@conditional_page()
+@cache_anonymous_page()
 def sources(request):
     """View all news sources."""
-    sources = Source.objects.annotate(news_count=Count('news')).order_by('name')
+    sources = Source.objects.order_by('name')
     
     context = {
         'sources': sources,
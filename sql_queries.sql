@@ -32,6 +32,7 @@ CREATE TABLE IF NOT EXISTS "News" (
     updated_at TIMESTAMP NOT NULL,
     is_read BOOLEAN DEFAULT FALSE,
     url VARCHAR(200) NOT NULL,
+    url_hash VARCHAR(40),
     FOREIGN KEY (source_id) REFERENCES "Source" (id) ON DELETE CASCADE
 );
 
@@ -110,10 +111,13 @@ CREATE TABLE IF NOT EXISTS "UserPreferenceCategory" (
 -- =============================================
 
 -- Create indexes for better query performance
-CREATE INDEX IF NOT EXISTS idx_news_published_at ON "News" (published_at);
-CREATE INDEX IF NOT EXISTS idx_news_source_id ON "News" (source_id);
-CREATE INDEX IF NOT EXISTS idx_newscategory_news_id ON "NewsCategory" (news_id);
-CREATE INDEX IF NOT EXISTS idx_newscategory_category_id ON "NewsCategory" (category_id);
+-- (the app's own versions are created by migration 0011_feed_indexes;
+-- check them with: python manage.py check_query_plans)
+CREATE INDEX IF NOT EXISTS idx_news_published_at ON "News" (published_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_news_source_published_at ON "News" (source_id, published_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_news_title ON "News" (title);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_news_url_hash ON "News" (url_hash) WHERE url_hash IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_newscategory_category_news ON "NewsCategory" (category_id, news_id);
 CREATE INDEX IF NOT EXISTS idx_comment_news_id ON "Comment" (news_id);
 CREATE INDEX IF NOT EXISTS idx_bookmark_user_id ON "Bookmark" (user_id);
 CREATE INDEX IF NOT EXISTS idx_bookmark_news_id ON "Bookmark" (news_id);